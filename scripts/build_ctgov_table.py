@@ -88,7 +88,7 @@ def _write_table_header(path: Path) -> None:
         w.writerow(["cid", "nct_id", "title", "phase"])
 
 
-def main() -> int:
+def main(argv: Optional[List[str]] = None) -> int:
     p = argparse.ArgumentParser(prog="build-ctgov-table")
     p.add_argument(
         "--hnid",
@@ -109,7 +109,7 @@ def main() -> int:
         help="Comma-separated CT.gov fields to request (optional)",
     )
     p.add_argument("--resume", action="store_true", help="Resume from existing outputs")
-    args = p.parse_args()
+    args = p.parse_args(argv)
 
     out_dir = Path(args.out_dir)
     cids_path = out_dir / "cids.txt"
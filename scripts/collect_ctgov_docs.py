@@ -52,6 +52,11 @@ def main() -> int:
     p.add_argument("--resume", action="store_true")
     p.add_argument("--show-progress", action="store_true")
     p.add_argument("--progress-every", type=int, default=50)
+    p.add_argument(
+        "--http-cache",
+        default=None,
+        help="SQLite file caching PubChem/CTGov responses across runs (e.g. out/.cache/cache.db)",
+    )
     args = p.parse_args()
 
     hnids = [args.hnid] + [int(x) for x in _parse_csv_list(args.extra_hnids)]
@@ -69,6 +74,8 @@ def main() -> int:
         print(f"[setup] NCT limit: {args.limit_ncts}")
     if args.ctgov_fields:
         print(f"[setup] CTGov fields: {args.ctgov_fields}")
+    if args.http_cache:
+        print(f"[setup] HTTP response cache: {args.http_cache}")
     if args.show_progress:
         print(f"[setup] Progress interval: every {progress_every} items")
 
@@ -81,6 +88,7 @@ def main() -> int:
         use_ctgov_fallback=args.use_ctgov_fallback,
         resume=args.resume,
         progress_every=progress_every,
+        http_cache_path=args.http_cache,
     )
 
     try:
@@ -305,7 +305,7 @@ def _print_progress(
     )
 
 
-def main() -> int:
+def main(argv: Optional[List[str]] = None) -> int:
     p = argparse.ArgumentParser(prog="export-pubchem-trials-dataset")
     p.add_argument("--hnid", type=int, default=1856916, help="PubChem HNID (default: 1856916)")
     p.add_argument("--extra-hnids", default=None, help="Comma-separated extra HNIDs")
@@ -334,7 +334,7 @@ def main() -> int:
     )
     p.add_argument("--progress-every", type=int, default=50, help="Progress print interval")
     p.add_argument("--show-progress", action="store_true", help="Print per-CID progress logs")
-    args = p.parse_args()
+    args = p.parse_args(argv)
     if args.cid_offset < 0:
         raise ValueError("--cid-offset must be >= 0")
     if args.cid_count is not None and args.cid_count <= 0:
@@ -8,7 +8,7 @@ import argparse
 import csv
 import json
 from pathlib import Path
-from typing import Dict, Iterable, List, Sequence, Set, Tuple
+from typing import Dict, Iterable, List, Optional, Sequence, Set
 
 COMPOUND_FIELDS: Sequence[str] = (
     "cid",
@@ -110,11 +110,11 @@ def _compact_rows(rows: Sequence[Dict[str, object]]) -> List[Dict[str, object]]:
     return [{k: v for k, v in row.items() if k not in TRIAL_COMPACT_DROP_FIELDS} for row in rows]
 
 
-def main() -> int:
+def main(argv: Optional[List[str]] = None) -> int:
     p = argparse.ArgumentParser(prog="merge-pubchem-trials-shards")
     p.add_argument("--shard-dirs", required=True, help="Comma-separated shard output directories")
     p.add_argument("--out-dir", required=True, help="Merged output directory")
-    args = p.parse_args()
+    args = p.parse_args(argv)
 
     shard_dirs = [Path(x.strip()) for x in args.shard_dirs.split(",") if x.strip()]
     if not shard_dirs:
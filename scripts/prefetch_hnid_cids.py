@@ -43,7 +43,7 @@ def _write_cids(path: Path, cids: Sequence[int]) -> None:
     path.write_text("".join(f"{x}\n" for x in cids), encoding="utf-8")
 
 
-def main() -> int:
+def main(argv: Optional[List[str]] = None) -> int:
     p = argparse.ArgumentParser(prog="prefetch-hnid-cids")
     p.add_argument("--hnid", type=int, required=True, help="Primary PubChem HNID")
     p.add_argument("--extra-hnids", default=None, help="Comma-separated extra HNIDs")
@@ -54,7 +54,7 @@ def main() -> int:
         action="store_true",
         help="On successful API fetch, also update fallback-file",
     )
-    args = p.parse_args()
+    args = p.parse_args(argv)
 
     hnids = [args.hnid] + [int(x) for x in _parse_csv_list(args.extra_hnids)]
     out_file = Path(args.out_file)
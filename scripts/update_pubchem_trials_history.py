@@ -10,7 +10,7 @@ import json
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 import shutil
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 
 def _now_utc_iso() -> str:
@@ -71,7 +71,7 @@ def _prune_old_snapshots(history_dir: Path, now_ts: datetime, retention_days: in
     return deleted
 
 
-def main() -> int:
+def main(argv: Optional[List[str]] = None) -> int:
     p = argparse.ArgumentParser(prog="update-pubchem-trials-history")
     p.add_argument("--trials-file", required=True, help="Newly collected trials.json path")
     p.add_argument("--compounds-file", default=None, help="Optional newly collected compounds.json path")
@@ -94,7 +94,7 @@ def main() -> int:
         action="store_true",
         help="Save history snapshot only when file content changed (default: snapshot every collection run)",
     )
-    args = p.parse_args()
+    args = p.parse_args(argv)
 
     state_file = Path(args.state_file)
     history_dir = Path(args.history_dir)
@@ -10,6 +10,7 @@ import json
 from pathlib import Path
 import shutil
 from datetime import datetime, timezone
+from typing import List, Optional
 
 
 def _now_utc_iso() -> str:
@@ -44,7 +45,7 @@ def _write_state(path: Path, obj: dict) -> None:
     path.write_text(json.dumps(obj, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
 
 
-def main() -> int:
+def main(argv: Optional[List[str]] = None) -> int:
     p = argparse.ArgumentParser(prog="update-studies-history")
     p.add_argument("--studies-file", required=True, help="Newly collected studies.jsonl path")
     p.add_argument("--state-file", default="data/ctgov/collection_state.json")
@@ -52,7 +53,7 @@ def main() -> int:
     p.add_argument("--history-dir", default="data/ctgov/history")
     p.add_argument("--timestamp", default=None, help="UTC timestamp override (ISO8601)")
     p.add_argument("--changed-flag-path", default=None, help="Write 'true' or 'false' for workflow")
-    args = p.parse_args()
+    args = p.parse_args(argv)
 
     studies_file = Path(args.studies_file)
     if not studies_file.exists():
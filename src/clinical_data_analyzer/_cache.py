@@ -0,0 +1,158 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2026 Magic AI Research Association
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Union
+
+DEFAULT_TTL_SEC = 30 * 24 * 3600
+# Entry bound for per-client in-memory memos; clients live for a whole collect/export run.
+DEFAULT_MEMO_SIZE = 100_000
+# Set to 1/true/yes to ignore stored entries (they are refetched and overwritten).
+REFRESH_ENV = "CLINPIPE_HTTP_CACHE_REFRESH"
+_TRUTHY = frozenset({"1", "true", "yes"})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    endpoint TEXT NOT NULL,
+    key TEXT NOT NULL,
+    response_json TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (endpoint, key)
+)
+"""
+_SELECT = "SELECT response_json, fetched_at FROM cache WHERE endpoint=? AND key=?"
+_UPSERT = (
+    "INSERT OR REPLACE INTO cache (endpoint, key, response_json, fetched_at) VALUES (?, ?, ?, ?)"
+)
+
+
+def _call_key(args: Sequence[Any], kwargs: Dict[str, Any]) -> str:
+    return json.dumps([list(args), sorted(kwargs.items())], default=str)
+
+
+class LruCache:
+    """
+    Thread-safe in-memory map that evicts the least recently used entry past ``maxsize``.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MEMO_SIZE):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class HttpCache:
+    """
+    On-disk cache of decoded API responses, keyed by (endpoint, key).
+
+    Backed by SQLite in WAL mode so that several runs (and the pipeline's worker
+    threads) can share one file. Only successful results are stored.
+    """
+
+    def __init__(self, path: Union[str, Path], *, ttl_sec: float = DEFAULT_TTL_SEC):
+        self.path = Path(path)
+        self.ttl_sec = ttl_sec
+        self.refresh = os.environ.get(REFRESH_ENV, "").strip().lower() in _TRUTHY
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+
+    def __enter__(self) -> "HttpCache":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def get(self, endpoint: str, key: str) -> Optional[Any]:
+        if self.refresh:
+            return None
+        with self._lock:
+            row = self._conn.execute(_SELECT, (endpoint, key)).fetchone()
+        if row is None or time.time() - row[1] > self.ttl_sec:
+            return None
+        return json.loads(row[0])
+
+    def put(self, endpoint: str, key: str, value: Any) -> None:
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(_UPSERT, (endpoint, key, payload, time.time()))
+
+    def wrap(self, endpoint: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """Return ``fn`` memoized on its arguments. Results must be JSON-serializable."""
+
+        def cached(*args: Any, **kwargs: Any) -> Any:
+            key = _call_key(args, kwargs)
+            hit = self.get(endpoint, key)
+            if hit is not None:
+                return hit
+            value = fn(*args, **kwargs)
+            self.put(endpoint, key, value)
+            return value
+
+        return cached
+
+
+class CachedClient:
+    """
+    Proxy that routes selected client methods through an ``HttpCache``.
+
+    Every other attribute is forwarded to the wrapped client unchanged.
+    """
+
+    def __init__(self, client: Any, cache: HttpCache, methods: Sequence[str]):
+        self._client = client
+        self._cache = cache
+        self._name = type(client).__name__
+        for m in methods:
+            setattr(self, m, cache.wrap(f"{self._name}.{m}", getattr(client, m)))
+
+    def cache_lookup(self, method: str, *args: Any, **kwargs: Any) -> Optional[Any]:
+        """Stored result of ``method(*args, **kwargs)``, or None; never calls the client."""
+        return self._cache.get(f"{self._name}.{method}", _call_key(args, kwargs))
+
+    def cache_store(self, method: str, value: Any, *args: Any, **kwargs: Any) -> None:
+        """Store ``value`` as the result of ``method(*args, **kwargs)``."""
+        self._cache.put(f"{self._name}.{method}", _call_key(args, kwargs), value)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
@@ -0,0 +1,104 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2026 Magic AI Research Association
+
+from __future__ import annotations
+
+from typing import Callable, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+from tenacity import Retrying, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+T = TypeVar("T")
+
+
+def pooled_session(
+    user_agent: str,
+    *,
+    pool_connections: int = 8,
+    pool_maxsize: int = 32,
+) -> requests.Session:
+    """
+    Build a keep-alive Session with a sized connection pool.
+
+    Retries stay with the tenacity decorators on each client, so the adapter
+    does not retry on its own.
+    """
+    s = requests.Session()
+    s.headers.update({"User-Agent": user_agent})
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+
+def response_snippet(r: requests.Response, limit: int = 500) -> str:
+    """Head of a response body for error messages, without decoding the whole body."""
+    return r.content[:limit].decode("utf-8", errors="replace")
+
+
+def attempt_timeout(cap: float, attempt: int) -> float:
+    """
+    Per-attempt timeout: cap/2 on the first attempt, then ``cap``.
+
+    Large but healthy responses (whole PUG-View records) can take several seconds,
+    so a shorter first timeout would cut them off and pay for a retry every time.
+    """
+    return cap / 2 if attempt <= 1 else cap
+
+
+def retry_with_timeouts(
+    call: Callable[[float], T],
+    cap: float,
+    *,
+    attempts: int = 5,
+    max_wait: float = 8.0,
+) -> T:
+    """
+    Run ``call(timeout)`` with the clients' usual tenacity policy, growing the timeout per attempt.
+
+    A stalled first connection gives up after half the timeout instead of the
+    full one; retries, and slow but healthy endpoints, still get ``cap``.
+    """
+    for attempt in Retrying(
+        reraise=True,
+        stop=stop_after_attempt(attempts),
+        wait=wait_exponential(multiplier=0.5, min=0.5, max=max_wait),
+        retry=retry_if_exception_type((requests.RequestException,)),
+    ):
+        with attempt:
+            return call(attempt_timeout(cap, attempt.retry_state.attempt_number))
+    raise AssertionError("unreachable")  # Retrying either returns or reraises
+
+
+class PooledSessionMixin:
+    """
+    Give a frozen client dataclass one keep-alive ``pooled_session`` for its lifetime.
+
+    Requests made through ``_session()`` reuse TCP/TLS connections instead of
+    handshaking per call. Clients can be used as context managers to close it.
+
+    The session belongs to the client instance, not to a thread: the pipelines'
+    worker pools share it. That is safe here because nothing mutates the session
+    after ``pooled_session`` builds it (headers and adapters are fixed, and the
+    cookie jar locks internally), and urllib3's connection pool hands each
+    in-flight request its own connection. Up to ``pool_maxsize`` connections per
+    host are kept alive; beyond that, extra ones are opened and discarded.
+    """
+
+    user_agent: str
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_http", pooled_session(self.user_agent))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._http.close()
+
+    def _session(self) -> requests.Session:
+        return self._http
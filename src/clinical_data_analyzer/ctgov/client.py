@@ -4,13 +4,20 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, Iterator, Optional, Sequence, Union
+from typing import Any, Dict, FrozenSet, Iterator, Optional, Sequence, Union
 import json
 import logging
-import time
 
 import requests
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import (
+    RetryCallState,
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+)
+
+from clinical_data_analyzer._http import PooledSessionMixin, response_snippet
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +26,30 @@ class CTGovError(RuntimeError):
 
 
 class CTGovRateLimitError(CTGovError):
-    pass
+    def __init__(self, message: str, *, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+_backoff = wait_exponential(multiplier=0.5, min=0.5, max=8)
+
+
+def _wait_retry_after(retry_state: RetryCallState) -> float:
+    """Wait for the server's Retry-After when given, else back off exponentially."""
+    exc = retry_state.outcome.exception() if retry_state.outcome else None
+    if isinstance(exc, CTGovRateLimitError) and exc.retry_after is not None:
+        return exc.retry_after
+    return _backoff(retry_state)
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        # HTTP-date form; fall back to exponential backoff.
+        return None
 
 
 class CTGovSort:
@@ -41,17 +71,24 @@ class CTGovFilterKey:
     ADVANCED = "advanced"
 
 
-CTGOV_QUERY_KEYS = {
-    "cond",
-    "intr",
-    "term",
-    "titles",
-    "locn",
-    "spons",
-    "lead",
-    "outc",
-    "id",
-}
+CTGOV_QUERY_KEYS = frozenset(
+    {
+        "cond",
+        "intr",
+        "term",
+        "titles",
+        "locn",
+        "spons",
+        "lead",
+        "outc",
+        "id",
+    }
+)
+
+_QUERY_PREFIX = "query."
+_QP_LEN = len(_QUERY_PREFIX)
+
+
 def _normalize_fields(fields: Optional[Union[str, Sequence[str]]]) -> Optional[str]:
     if not fields:
         return None
@@ -77,24 +114,65 @@ def _merge_query(
     query: Optional[Dict[str, str]],
     *,
     validate: bool = False,
-    allowed: Optional[set[str]] = None,
+    allowed: Optional[FrozenSet[str]] = None,
 ) -> None:
     if not query:
         return
+    allowed_keys = allowed or CTGOV_QUERY_KEYS
     for k, v in query.items():
         if not k or v is None:
             continue
-        key = f"query.{k}" if not k.startswith("query.") else k
-        if validate:
-            base_key = key[len("query.") :] if key.startswith("query.") else key
-            allowed_keys = allowed or CTGOV_QUERY_KEYS
-            if base_key not in allowed_keys:
-                raise CTGovError(f"Invalid query key: {base_key}")
+        if k.startswith(_QUERY_PREFIX):
+            key = k
+            base_key = k[_QP_LEN:]
+        else:
+            key = _QUERY_PREFIX + k
+            base_key = k
+        if validate and base_key not in allowed_keys:
+            raise CTGovError(f"Invalid query key: {base_key}")
         if key not in params:
             params[key] = v
 
 
+def _names(items: Any) -> list[str]:
+    if not isinstance(items, list):
+        return []
+    return [
+        it if isinstance(it, str) else it.get("name")
+        for it in items
+        if isinstance(it, str) or (isinstance(it, dict) and isinstance(it.get("name"), str))
+    ]
+
+
+def _date(value: Any) -> Optional[str]:
+    if isinstance(value, dict):
+        return value.get("date")
+    return value
+
+
+def _extract_flat_study_compact(study_obj: Dict[str, Any]) -> Dict[str, Any]:
+    lead = study_obj.get("leadSponsor")
+    return {
+        "nct_id": study_obj.get("nctId"),
+        "brief_title": study_obj.get("briefTitle"),
+        "official_title": study_obj.get("officialTitle"),
+        "overall_status": study_obj.get("overallStatus"),
+        "start_date": _date(study_obj.get("startDateStruct") or study_obj.get("startDate")),
+        "completion_date": _date(
+            study_obj.get("completionDateStruct") or study_obj.get("completionDate")
+        ),
+        "conditions": [c for c in study_obj.get("conditions") or [] if isinstance(c, str)],
+        "interventions": _names(study_obj.get("interventions")),
+        "lead_sponsor": lead.get("name") if isinstance(lead, dict) else lead,
+        "collaborators": _names(study_obj.get("collaborators")),
+    }
+
+
 def extract_study_compact(study_obj: Dict[str, Any]) -> Dict[str, Any]:
+    # Fast path: already-flat objects (top-level nctId, no protocolSection tree).
+    if "nctId" in study_obj and "protocolSection" not in study_obj:
+        return _extract_flat_study_compact(study_obj)
+
     ps = study_obj.get("protocolSection") or {}
     ident = ps.get("identificationModule") or {}
     status = ps.get("statusModule") or {}
@@ -134,7 +212,7 @@ def extract_study_compact(study_obj: Dict[str, Any]) -> Dict[str, Any]:
         "collaborators": collaborator_names,
     }
 @dataclass(frozen=True)
-class CTGovClient:
+class CTGovClient(PooledSessionMixin):
     base_url: str = "https://clinicaltrials.gov/api/v2"
     timeout: float = 30.0
     user_agent: str = "clinical-data-pipeline/0.1 (magicai-labs)"
@@ -142,44 +220,36 @@ class CTGovClient:
     log_requests: bool = False
     request_id_headers: Sequence[str] = ("x-request-id", "x-requestid", "x-correlation-id")
 
-    def _session(self) -> requests.Session:
-        s = requests.Session()
-        s.headers.update({"User-Agent": self.user_agent})
-        return s
-
     @retry(
         reraise=True,
         stop=stop_after_attempt(5),
-        wait=wait_exponential(multiplier=0.5, min=0.5, max=8),
+        wait=_wait_retry_after,
         retry=retry_if_exception_type((requests.RequestException, CTGovRateLimitError)),
     )
     def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         url = f"{self.base_url}{path}"
-        with self._session() as s:
-            r = s.get(url, params=params, timeout=self.timeout)
-            if self.log_requests:
-                request_id = None
-                for h in self.request_id_headers:
-                    request_id = r.headers.get(h)
-                    if request_id:
-                        break
-                logger.info("CTGov GET %s status=%s request_id=%s", url, r.status_code, request_id)
-            try:
-                if r.status_code in (408, 429, 503, 504):
-                    retry_after = r.headers.get("Retry-After")
-                    if retry_after:
-                        try:
-                            time.sleep(float(retry_after))
-                        except ValueError:
-                            pass
-                    raise CTGovRateLimitError(f"HTTP {r.status_code} for {url}: {r.text[:500]}")
-                r.raise_for_status()
-            except requests.HTTPError as e:
-                raise CTGovError(f"HTTP {r.status_code} for {url}: {r.text[:500]}") from e
-            try:
-                return r.json()
-            except json.JSONDecodeError as e:
-                raise CTGovError(f"Invalid JSON response for {url}: {r.text[:500]}") from e
+        r = self._session().get(url, params=params, timeout=self.timeout)
+        if self.log_requests:
+            request_id = None
+            for h in self.request_id_headers:
+                request_id = r.headers.get(h)
+                if request_id:
+                    break
+            logger.info("CTGov GET %s status=%s request_id=%s", url, r.status_code, request_id)
+        try:
+            if r.status_code in (408, 429, 503, 504):
+                raise CTGovRateLimitError(
+                    f"HTTP {r.status_code} for {url}: {response_snippet(r)}",
+                    retry_after=_parse_retry_after(r.headers.get("Retry-After")),
+                )
+            r.raise_for_status()
+        except requests.HTTPError as e:
+            raise CTGovError(f"HTTP {r.status_code} for {url}: {response_snippet(r)}") from e
+        try:
+            # Parse the raw bytes; skips requests' charset sniffing and str decode.
+            return json.loads(r.content)
+        except ValueError as e:
+            raise CTGovError(f"Invalid JSON response for {url}: {response_snippet(r)}") from e
 
     def search_studies(
         self,
@@ -210,7 +280,7 @@ class CTGovClient:
         if term:
             params["query.term"] = term
         if query:
-            allowed = set(allowed_query_keys) if allowed_query_keys else None
+            allowed = frozenset(allowed_query_keys) if allowed_query_keys else None
             _merge_query(params, query, validate=validate_query_keys, allowed=allowed)
         if sort:
             params["sort"] = sort
@@ -247,6 +317,9 @@ class CTGovClient:
         count_total: bool = False,
     ) -> Iterator[Dict[str, Any]]:
         """Yield study objects from paginated results."""
+        # Freeze once; frozenset() of a frozenset is a no-op in search_studies.
+        if allowed_query_keys:
+            allowed_query_keys = frozenset(allowed_query_keys)
         token: Optional[str] = start_page_token
         pages = 0
         yielded = 0
@@ -0,0 +1,61 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2026 Magic AI Research Association
+
+from __future__ import annotations
+
+import json
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, TextIO
+
+JSONL_BLOCK_ROWS = 10_000
+JSONL_BUFFER_BYTES = 1 << 20
+# json.dumps(..., ensure_ascii=False) builds a new JSONEncoder per call; reuse one.
+JSONL_ENCODER = json.JSONEncoder(ensure_ascii=False)
+
+
+def write_jsonl(path: Path, rows: Iterable[Dict[str, Any]]) -> None:
+    """Write rows as JSONL, one write per block of rows instead of per row."""
+    it = iter(rows)
+    encode = JSONL_ENCODER.encode
+    with path.open("w", encoding="utf-8", buffering=JSONL_BUFFER_BYTES) as f:
+        while True:
+            block = [encode(r) for r in islice(it, JSONL_BLOCK_ROWS)]
+            if not block:
+                break
+            block.append("")
+            f.write("\n".join(block))
+
+
+class JsonlAppender:
+    """
+    Append-mode JSONL writer that keeps one buffered handle open across rows.
+
+    The file is opened on the first write, so untouched outputs are not created.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._f: Optional[TextIO] = None
+        self._encode = JSONL_ENCODER.encode
+
+    def write(self, row: Dict[str, Any]) -> None:
+        if self._f is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._f = self.path.open("a", encoding="utf-8", buffering=JSONL_BUFFER_BYTES)
+        self._f.write(self._encode(row) + "\n")
+
+    def flush(self) -> None:
+        if self._f is not None:
+            self._f.flush()
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def __enter__(self) -> "JsonlAppender":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -3,11 +3,13 @@
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
-import json
+from typing import Any, Dict, List, Optional, Tuple
 
+from clinical_data_analyzer.pipeline._jsonl import write_jsonl
+from clinical_data_analyzer.pipeline.cid_to_nct import prefetch_compound_properties
 from clinical_data_analyzer.pipeline.linker import CompoundTrialLinker, LinkResult
 
 
@@ -16,18 +18,13 @@ class DatasetBuildConfig:
     out_dir: str = "out"
     write_jsonl: bool = True
     max_synonyms_in_compound: int = 30
+    max_workers: int = 4  # concurrent CIDs; keep low to respect PubChem rate limits
 
 
 def _safe_mkdir(p: Path) -> None:
     p.mkdir(parents=True, exist_ok=True)
 
 
-def _write_jsonl(path: Path, rows: Iterable[Dict[str, Any]]) -> None:
-    with path.open("w", encoding="utf-8") as f:
-        for r in rows:
-            f.write(json.dumps(r, ensure_ascii=False) + "\n")
-
-
 def build_dataset_for_cids(
     cids: List[int],
     pubchem_client,
@@ -43,47 +40,52 @@ def build_dataset_for_cids(
     linker = linker or CompoundTrialLinker(pubchem_client, ctgov_client)
 
     compounds: List[Dict[str, Any]] = []
-    studies: Dict[str, Dict[str, Any]] = {}
     links: List[Dict[str, Any]] = []
 
-    for cid in cids:
+    def _process_cid(cid: int) -> Tuple[Dict[str, Any], List[LinkResult]]:
         props = pubchem_client.compound_properties(cid)
         syns = pubchem_client.synonyms(cid, max_items=cfg.max_synonyms_in_compound)
-
-        compounds.append(
-            {
-                "cid": cid,
-                "inchikey": props.get("InChIKey"),
-                "canonical_smiles": props.get("CanonicalSMILES"),
-                "iupac_name": props.get("IUPACName"),
-                "synonyms": syns,
-            }
+        compound = {
+            "cid": cid,
+            "inchikey": props.get("InChIKey"),
+            "canonical_smiles": props.get("CanonicalSMILES"),
+            "iupac_name": props.get("IUPACName"),
+            "synonyms": syns,
+        }
+        return compound, linker.link_cid(cid)
+
+    prefetch_compound_properties(pubchem_client, cids)
+
+    with ThreadPoolExecutor(max_workers=max(1, cfg.max_workers)) as ex:
+        # Pass 1 (CIDs): per-CID work is network-bound; map() keeps results in input order.
+        for compound, link_results in ex.map(_process_cid, cids):
+            compounds.append(compound)
+            for lr in link_results:
+                links.append(
+                    {
+                        "cid": lr.cid,
+                        "nct_id": lr.nct_id,
+                        "match_term": lr.evidence.term,
+                        "query_mode": lr.evidence.query_mode,
+                        "score": lr.evidence.score,
+                        "reasons": lr.evidence.reasons,
+                    }
+                )
+
+        # Pass 2 (NCTs): fetch each linked study once, in first-seen order.
+        unique_ncts = list(dict.fromkeys(row["nct_id"] for row in links))
+        studies: Dict[str, Dict[str, Any]] = dict(
+            zip(unique_ncts, ex.map(ctgov_client.get_study, unique_ncts))
         )
 
-        link_results: List[LinkResult] = linker.link_cid(cid)
-        for lr in link_results:
-            links.append(
-                {
-                    "cid": lr.cid,
-                    "nct_id": lr.nct_id,
-                    "match_term": lr.evidence.term,
-                    "query_mode": lr.evidence.query_mode,
-                    "score": lr.evidence.score,
-                    "reasons": lr.evidence.reasons,
-                }
-            )
-
-            if lr.nct_id not in studies:
-                studies[lr.nct_id] = ctgov_client.get_study(lr.nct_id)
-
     outputs: Dict[str, Path] = {}
     if cfg.write_jsonl:
         p_comp = out_dir / "compounds.jsonl"
         p_links = out_dir / "links.jsonl"
         p_stud = out_dir / "studies.jsonl"
-        _write_jsonl(p_comp, compounds)
-        _write_jsonl(p_links, links)
-        _write_jsonl(p_stud, studies.values())
+        write_jsonl(p_comp, compounds)
+        write_jsonl(p_links, links)
+        write_jsonl(p_stud, studies.values())
         outputs.update({"compounds": p_comp, "links": p_links, "studies": p_stud})
 
     return outputs
@@ -3,12 +3,13 @@
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional
-import json
+from typing import Dict, List, Optional, Sequence
 
 from clinical_data_analyzer.ctgov import CTGovClient
+from clinical_data_analyzer.pipeline._jsonl import write_jsonl
 from clinical_data_analyzer.pipeline.linker import CompoundTrialLinker, LinkerConfig
 from clinical_data_analyzer.pubchem import PubChemClient, PubChemPugViewClient
 
@@ -25,16 +26,107 @@ class CidToNctConfig:
     fallback_min_score: int = 2
     fallback_max_links_per_cid: int = 30
     fail_fast: bool = False
+    max_workers: int = 4  # concurrent CIDs; keep low to respect PubChem rate limits
+
+
+SYNONYM_BATCH_SIZE = 100
+PROPERTY_BATCH_SIZE = 200
 
 
 def _ensure_dir(path: Path) -> None:
     path.mkdir(parents=True, exist_ok=True)
 
 
-def _write_jsonl(path: Path, rows: Iterable[dict]) -> None:
-    with path.open("w", encoding="utf-8") as f:
-        for r in rows:
-            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+def build_fallback_linker(
+    cfg: CidToNctConfig,
+    *,
+    pubchem: PubChemClient,
+    ctgov: CTGovClient,
+) -> Optional[CompoundTrialLinker]:
+    """
+    Return the CTGov term-link fallback linker for ``cfg``, or None when the fallback is off.
+    """
+    if not cfg.use_ctgov_fallback:
+        return None
+    return CompoundTrialLinker(
+        pubchem,
+        ctgov,
+        config=LinkerConfig(
+            max_synonyms=cfg.fallback_max_synonyms,
+            ctgov_page_size=cfg.fallback_ctgov_page_size,
+            ctgov_max_pages_per_term=cfg.fallback_ctgov_max_pages_per_term,
+            min_score=cfg.fallback_min_score,
+            max_links_per_cid=cfg.fallback_max_links_per_cid,
+        ),
+    )
+
+
+def prefetch_synonyms(
+    pubchem: PubChemClient,
+    cids: Sequence[int],
+    *,
+    max_items: int,
+    batch_size: int = SYNONYM_BATCH_SIZE,
+) -> Dict[int, List[str]]:
+    """
+    Fetch synonyms for ``cids`` in batched PubChem requests for the CTGov fallback linker.
+
+    Best effort: a failed batch is skipped and those CIDs fall back to the
+    per-CID lookup inside ``CompoundTrialLinker.link_cid``. Behind a ``CachedClient``,
+    stored ``synonyms`` results are reused and fetched ones are stored under the same
+    key, since ``link_cid`` does not call ``synonyms`` for prefetched CIDs.
+    """
+    fetch = getattr(pubchem, "synonyms_batch", None)
+    if fetch is None:
+        return {}
+    lookup = getattr(pubchem, "cache_lookup", None)
+    store = getattr(pubchem, "cache_store", None)
+    out: Dict[int, List[str]] = {}
+    if lookup is not None:
+        for cid in cids:
+            hit = lookup("synonyms", cid, max_items=max_items)
+            if hit is not None:
+                out[cid] = hit
+        cids = [c for c in cids if c not in out]
+    for i in range(0, len(cids), batch_size):
+        chunk = cids[i : i + batch_size]
+        try:
+            got = fetch(chunk, max_items=max_items)
+        except Exception:
+            continue
+        for cid in chunk:
+            out[cid] = got.get(cid, [])
+            # Only store what PubChem returned; an absent CID may be a partial response.
+            if store is not None and cid in got:
+                store("synonyms", got[cid], cid, max_items=max_items)
+    return out
+
+
+def prefetch_compound_properties(
+    pubchem: PubChemClient,
+    cids: Sequence[int],
+    *,
+    batch_size: int = PROPERTY_BATCH_SIZE,
+) -> None:
+    """
+    Warm ``pubchem``'s per-CID property cache with bulk PubChem requests.
+
+    Best effort: a failed batch is skipped and the next one is still tried; CIDs
+    missing from a bulk response (or from a failed batch) are looked up one at a
+    time by ``compound_properties`` as before. Behind a ``CachedClient``, CIDs whose
+    properties are already in the on-disk cache are not fetched again.
+    """
+    fetch = getattr(pubchem, "compound_properties_bulk", None)
+    if fetch is None:
+        return
+    lookup = getattr(pubchem, "cache_lookup", None)
+    if lookup is not None:
+        cids = [c for c in cids if lookup("compound_properties", c) is None]
+    for i in range(0, len(cids), batch_size):
+        try:
+            fetch(cids[i : i + batch_size], chunk=batch_size)
+        except Exception:
+            continue
 
 
 def cid_to_nct_ids(
@@ -54,17 +146,18 @@ def cids_to_nct_ids(
     *,
     pubchem: Optional[PubChemClient] = None,
     pug_view: Optional[PubChemPugViewClient] = None,
+    max_workers: int = 4,
 ) -> Dict[int, List[str]]:
     """
     Return mapping: CID -> [NCT IDs]
+
+    Lookups run on up to ``max_workers`` threads; the mapping keeps input order.
     """
     pubchem = pubchem or PubChemClient()
     pug_view = pug_view or PubChemPugViewClient()
 
-    mapping: Dict[int, List[str]] = {}
-    for cid in cids:
-        mapping[cid] = pug_view.nct_ids_for_cid(cid)
-    return mapping
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as ex:
+        return dict(zip(cids, ex.map(pug_view.nct_ids_for_cid, cids)))
 
 
 def export_cids_nct_dataset(
@@ -88,48 +181,46 @@ def export_cids_nct_dataset(
     pubchem = pubchem or PubChemClient()
     pug_view = pug_view or PubChemPugViewClient()
     ctgov = ctgov or CTGovClient()
-    linker: Optional[CompoundTrialLinker] = None
-    if cfg.use_ctgov_fallback:
-        linker = CompoundTrialLinker(
-            pubchem,
-            ctgov,
-            config=LinkerConfig(
-                max_synonyms=cfg.fallback_max_synonyms,
-                ctgov_page_size=cfg.fallback_ctgov_page_size,
-                ctgov_max_pages_per_term=cfg.fallback_ctgov_max_pages_per_term,
-                min_score=cfg.fallback_min_score,
-                max_links_per_cid=cfg.fallback_max_links_per_cid,
-            ),
-        )
+    linker = build_fallback_linker(cfg, pubchem=pubchem, ctgov=ctgov)
 
     links_rows: List[dict] = []
     compounds_rows: List[dict] = []
+    synonyms: Dict[int, List[str]] = {}
+    if cfg.include_compound_props:
+        prefetch_compound_properties(pubchem, cids)
+    if linker is not None:
+        synonyms = prefetch_synonyms(pubchem, cids, max_items=cfg.fallback_max_synonyms)
 
-    total = len(cids)
-    for idx, cid in enumerate(cids, start=1):
-        rec = map_cid_to_nct_record(
+    def _map_one(cid: int) -> Dict[str, dict]:
+        return map_cid_to_nct_record(
             cid,
             config=cfg,
             pubchem=pubchem,
             pug_view=pug_view,
             ctgov=ctgov,
+            linker=linker,
+            synonyms=synonyms.get(cid),
         )
-        links_rows.append(rec["link"])
-        if cfg.include_compound_props and "compound" in rec:
-            compounds_rows.append(rec["compound"])
 
-        if progress_every > 0 and (idx % progress_every == 0 or idx == total):
-            print(f"[cid->nct] processed {idx}/{total} CIDs")
+    total = len(cids)
+    with ThreadPoolExecutor(max_workers=max(1, cfg.max_workers)) as ex:
+        for idx, rec in enumerate(ex.map(_map_one, cids), start=1):
+            links_rows.append(rec["link"])
+            if cfg.include_compound_props and "compound" in rec:
+                compounds_rows.append(rec["compound"])
+
+            if progress_every > 0 and (idx % progress_every == 0 or idx == total):
+                print(f"[cid->nct] processed {idx}/{total} CIDs")
 
     outputs: Dict[str, Path] = {}
     if cfg.write_jsonl:
         p_links = out_dir / "cid_nct_links.jsonl"
-        _write_jsonl(p_links, links_rows)
+        write_jsonl(p_links, links_rows)
         outputs["cid_nct_links"] = p_links
 
         if cfg.include_compound_props:
             p_comp = out_dir / "compounds.jsonl"
-            _write_jsonl(p_comp, compounds_rows)
+            write_jsonl(p_comp, compounds_rows)
             outputs["compounds"] = p_comp
 
     return outputs
@@ -142,10 +233,16 @@ def map_cid_to_nct_record(
     pubchem: Optional[PubChemClient] = None,
     pug_view: Optional[PubChemPugViewClient] = None,
     ctgov: Optional[CTGovClient] = None,
+    linker: Optional[CompoundTrialLinker] = None,
+    synonyms: Optional[List[str]] = None,
 ) -> Dict[str, dict]:
     """
     Build a single CID mapping record and optional compound properties record.
 
+    Pass a ``linker`` from ``build_fallback_linker`` when mapping many CIDs so the
+    CTGov fallback linker is not rebuilt per call, and prefetched ``synonyms``
+    (see ``prefetch_synonyms``) to skip the linker's per-CID synonym lookup.
+
     Returns:
       {
         "link": {...},
@@ -157,19 +254,8 @@ def map_cid_to_nct_record(
     pug_view = pug_view or PubChemPugViewClient()
     ctgov = ctgov or CTGovClient()
 
-    linker: Optional[CompoundTrialLinker] = None
-    if cfg.use_ctgov_fallback:
-        linker = CompoundTrialLinker(
-            pubchem,
-            ctgov,
-            config=LinkerConfig(
-                max_synonyms=cfg.fallback_max_synonyms,
-                ctgov_page_size=cfg.fallback_ctgov_page_size,
-                ctgov_max_pages_per_term=cfg.fallback_ctgov_max_pages_per_term,
-                min_score=cfg.fallback_min_score,
-                max_links_per_cid=cfg.fallback_max_links_per_cid,
-            ),
-        )
+    if linker is None:
+        linker = build_fallback_linker(cfg, pubchem=pubchem, ctgov=ctgov)
 
     source = "PubChem PUG-View annotations"
     nct_ids: List[str] = []
@@ -187,8 +273,12 @@ def map_cid_to_nct_record(
 
     if not nct_ids and linker is not None:
         try:
-            link_results = linker.link_cid(cid)
-            nct_ids = sorted({lr.nct_id for lr in link_results})
+            if synonyms is None:
+                link_results = linker.link_cid(cid)
+            else:
+                link_results = linker.link_cid(cid, synonyms=synonyms)
+            # Keep the linker's ranking order; it is already deduplicated per NCT.
+            nct_ids = list(dict.fromkeys(lr.nct_id for lr in link_results))
             if nct_ids:
                 source = "CTGov term-link fallback (no PUG-View NCT IDs)"
         except Exception as e:
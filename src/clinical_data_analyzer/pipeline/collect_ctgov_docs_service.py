@@ -3,17 +3,32 @@
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, nullcontext
 from dataclasses import dataclass
 import csv
 import json
 from pathlib import Path
 import time
-from typing import Callable, Dict, List, Optional, Sequence, Set
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Set, Tuple
 
+from clinical_data_analyzer._cache import CachedClient, HttpCache
 from clinical_data_analyzer.ctgov import CTGovClient
-from clinical_data_analyzer.pipeline.cid_to_nct import CidToNctConfig, map_cid_to_nct_record
+from clinical_data_analyzer.pipeline._jsonl import JsonlAppender, write_jsonl
+from clinical_data_analyzer.pipeline.cid_to_nct import (
+    SYNONYM_BATCH_SIZE,
+    CidToNctConfig,
+    build_fallback_linker,
+    map_cid_to_nct_record,
+    prefetch_compound_properties,
+    prefetch_synonyms,
+)
 from clinical_data_analyzer.pubchem import PubChemClassificationClient, PubChemClient, PubChemPugViewClient
 
+# Shared read-only default for missing sub-objects, so a miss allocates nothing.
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
 
 @dataclass(frozen=True)
 class CollectCtgovDocsConfig:
@@ -25,6 +40,8 @@ class CollectCtgovDocsConfig:
     use_ctgov_fallback: bool = False
     resume: bool = False
     progress_every: int = 0
+    max_workers: int = 4
+    http_cache_path: Optional[str] = None  # SQLite response cache shared across runs
 
 
 @dataclass(frozen=True)
@@ -40,68 +57,61 @@ class CollectCtgovDocsResult:
     paths: Dict[str, Path]
 
 
-def _write_jsonl(path: Path, row: dict) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(row, ensure_ascii=False) + "\n")
-
-
 def _write_jsonl_rows(path: Path, rows: List[dict]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
-        for row in rows:
-            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    write_jsonl(path, rows)
 
 
-def _load_jsonl(path: Path) -> List[dict]:
+def _iter_jsonl(path: Path) -> Iterator[dict]:
+    """Yield one parsed row at a time so resume loading never holds the whole file."""
     if not path.exists():
-        return []
-    out: List[dict] = []
+        return
     with path.open("r", encoding="utf-8") as f:
         for line in f:
             line = line.strip()
             if line:
-                out.append(json.loads(line))
-    return out
+                yield json.loads(line)
 
 
 def _load_processed_cids(path: Path) -> Set[int]:
-    seen: Set[int] = set()
-    for obj in _load_jsonl(path):
-        cid = obj.get("cid")
-        if isinstance(cid, int):
-            seen.add(cid)
-    return seen
+    return {cid for cid in (obj.get("cid") for obj in _iter_jsonl(path)) if isinstance(cid, int)}
 
 
 def _extract_nct_id(study_obj: dict) -> Optional[str]:
     return (
-        study_obj.get("protocolSection", {})
-        .get("identificationModule", {})
+        study_obj.get("protocolSection", _EMPTY)
+        .get("identificationModule", _EMPTY)
         .get("nctId")
     )
 
 
 def _load_study_cache_by_nct(path: Path) -> Dict[str, dict]:
     cache: Dict[str, dict] = {}
-    for obj in _load_jsonl(path):
+    for obj in _iter_jsonl(path):
         nct = _extract_nct_id(obj)
-        if isinstance(nct, str) and nct and nct not in cache:
-            cache[nct] = obj
+        if isinstance(nct, str) and nct:
+            cache.setdefault(nct, obj)
     return cache
 
 
-def _fetch_cids_by_hnids(hnids: Sequence[int], out_dir: Path, limit: Optional[int]) -> Dict[str, Path]:
-    class_nodes = PubChemClassificationClient()
+def _fetch_cids_by_hnids(
+    hnids: Sequence[int], out_dir: Path, limit: Optional[int]
+) -> Tuple[Dict[str, Path], List[int]]:
     cid_to_hnids: Dict[int, Set[int]] = {}
     ordered_cids: List[int] = []
 
-    for hnid in hnids:
-        for cid in class_nodes.get_cids(int(hnid), fmt="TXT"):
+    hnid_list = [int(h) for h in hnids]
+    # HNID downloads are independent; fetch them together, merge in input order.
+    with PubChemClassificationClient() as class_nodes:
+        with ThreadPoolExecutor(max_workers=max(1, min(8, len(hnid_list)))) as ex:
+            cid_lists = list(ex.map(lambda h: class_nodes.get_cids(h, fmt="TXT"), hnid_list))
+
+    for hnid, hnid_cids in zip(hnid_list, cid_lists):
+        for cid in hnid_cids:
             if cid not in cid_to_hnids:
                 cid_to_hnids[cid] = set()
                 ordered_cids.append(cid)
-            cid_to_hnids[cid].add(int(hnid))
+            cid_to_hnids[cid].add(hnid)
 
     if limit is not None:
         ordered_cids = ordered_cids[:limit]
@@ -114,7 +124,7 @@ def _fetch_cids_by_hnids(hnids: Sequence[int], out_dir: Path, limit: Optional[in
         cids_jsonl,
         [{"cid": cid, "source_hnids": sorted(cid_to_hnids.get(cid, set()))} for cid in ordered_cids],
     )
-    return {"cids_txt": cids_txt, "cids_jsonl": cids_jsonl}
+    return {"cids_txt": cids_txt, "cids_jsonl": cids_jsonl}, ordered_cids
 
 
 def collect_ctgov_docs(
@@ -132,8 +142,8 @@ def collect_ctgov_docs(
     studies_path = out_dir / "studies.jsonl"
 
     log(f"[1/3] Loading CIDs from HNIDs: {','.join(str(h) for h in config.hnids)}")
-    step1 = _fetch_cids_by_hnids(config.hnids, out_dir=out_dir, limit=config.limit_cids)
-    cids = [int(x.strip()) for x in step1["cids_txt"].read_text(encoding="utf-8").splitlines() if x.strip()]
+    # cids.txt is written for external consumers; use the in-memory list here.
+    step1, cids = _fetch_cids_by_hnids(config.hnids, out_dir=out_dir, limit=config.limit_cids)
     log(f"      done: {len(cids)} CIDs")
 
     if not map_csv_path.exists():
@@ -147,71 +157,128 @@ def collect_ctgov_docs(
     existing_ncts = set(study_cache.keys())
     existing_ncts_before = len(existing_ncts)
 
-    pubchem = PubChemClient()
-    pug_view = PubChemPugViewClient()
-    ctgov = CTGovClient()
+    http_cache = HttpCache(config.http_cache_path) if config.http_cache_path else None
+    clients = (PubChemClient(), PubChemPugViewClient(), CTGovClient())
+    pubchem, pug_view, ctgov = clients
+    if http_cache is not None:
+        # Only per-CID results are cached (not raw PUG-View records as well): the NCT list
+        # is all this pipeline reads from a record, and records run to megabytes.
+        pubchem = CachedClient(pubchem, http_cache, ("compound_properties", "synonyms"))
+        pug_view = CachedClient(
+            pug_view, http_cache, ("nct_ids_for_cid_with_source", "nct_ids_for_cid")
+        )
+        ctgov = CachedClient(ctgov, http_cache, ("get_study",))
     cid_cfg = CidToNctConfig(
         out_dir=str(out_dir),
         write_jsonl=True,
         include_compound_props=True,
         use_ctgov_fallback=config.use_ctgov_fallback,
     )
+    linker = build_fallback_linker(cid_cfg, pubchem=pubchem, ctgov=ctgov)
 
     nct_fetch_limit = config.limit_ncts if config.limit_ncts is not None else 10**9
     nct_requested = 0
     nct_fetched = 0
     nct_total_mapped = 0
     total_cids = len(cids)
+    window: Set[int] = set()
+    synonyms: Dict[int, List[str]] = {}
 
     log("[2/3 + 3/3] Streaming CID -> NCT -> CTGov documents")
-    for idx, cid in enumerate(cids, start=1):
-        if cid in processed_cids:
-            if config.progress_every > 0 and (idx % config.progress_every == 0 or idx == total_cids):
-                log(f"[stream] CID {idx}/{total_cids} skipped (resume): cid={cid}")
-            continue
-
-        rec = map_cid_to_nct_record(
-            cid,
-            config=cid_cfg,
-            pubchem=pubchem,
-            pug_view=pug_view,
-            ctgov=ctgov,
-        )
-        link_row = rec["link"]
-        nct_ids = [n for n in link_row.get("nct_ids", []) if isinstance(n, str)]
-        nct_total_mapped += len(nct_ids)
+    links_out = JsonlAppender(links_path)
+    compounds_out = JsonlAppender(compounds_path)
+    studies_out = JsonlAppender(studies_path)
+    appenders = (links_out, compounds_out, studies_out)
+    ctgov_fields = list(config.ctgov_fields) if config.ctgov_fields else None
+
+    def _fetch_study(nct: str) -> dict:
+        return ctgov.get_study(nct, fields=ctgov_fields)
+
+    fetch_pool = ThreadPoolExecutor(max_workers=max(1, config.max_workers))
+    with ExitStack() as stack:
+        for resource in (http_cache or nullcontext(), *clients, fetch_pool, *appenders):
+            stack.enter_context(resource)
+        csv_f = stack.enter_context(map_csv_path.open("a", newline="", encoding="utf-8"))
+        csv_writer = csv.writer(csv_f)
+        for idx, cid in enumerate(cids, start=1):
+            if cid in processed_cids:
+                if config.progress_every > 0 and (
+                    idx % config.progress_every == 0 or idx == total_cids
+                ):
+                    log(f"[stream] CID {idx}/{total_cids} skipped (resume): cid={cid}")
+                continue
 
-        _write_jsonl(links_path, link_row)
-        if "compound" in rec:
-            _write_jsonl(compounds_path, rec["compound"])
+            if cid not in window:
+                # Prefetch properties (and fallback synonyms) for the next window of CIDs
+                # in bulk requests instead of one request per CID.
+                upcoming = cids[idx - 1 : idx - 1 + SYNONYM_BATCH_SIZE]
+                window_cids = [c for c in upcoming if c not in processed_cids]
+                window = set(window_cids)
+                prefetch_compound_properties(pubchem, window_cids)
+                if linker is not None:
+                    synonyms = prefetch_synonyms(
+                        pubchem, window_cids, max_items=cid_cfg.fallback_max_synonyms
+                    )
+
+            rec = map_cid_to_nct_record(
+                cid,
+                config=cid_cfg,
+                pubchem=pubchem,
+                pug_view=pug_view,
+                ctgov=ctgov,
+                linker=linker,
+                synonyms=synonyms.get(cid),
+            )
+            link_row = rec["link"]
+            nct_ids = [n for n in link_row.get("nct_ids", []) if isinstance(n, str)]
+            nct_total_mapped += len(nct_ids)
 
-        with map_csv_path.open("a", newline="", encoding="utf-8") as f:
-            w = csv.writer(f)
+            links_out.write(link_row)
+            if "compound" in rec:
+                compounds_out.write(rec["compound"])
+
+            csv_writer.writerows((cid, nct) for nct in nct_ids)
+
+            # Decide what this CID emits first, then fetch its missing studies
+            # together; writes still follow nct_ids order.
+            emit: List[str] = []
+            to_fetch: List[str] = []
             for nct in nct_ids:
-                w.writerow([cid, nct])
-
-        for nct in nct_ids:
-            study_obj = study_cache.get(nct)
-            if study_obj is None and nct not in existing_ncts:
-                if nct_requested >= nct_fetch_limit:
-                    break
-                nct_requested += 1
-                study_obj = ctgov.get_study(nct, fields=list(config.ctgov_fields) if config.ctgov_fields else None)
+                if nct not in study_cache and nct not in existing_ncts:
+                    if nct_requested >= nct_fetch_limit:
+                        break
+                    nct_requested += 1
+                    existing_ncts.add(nct)
+                    to_fetch.append(nct)
+                emit.append(nct)
+
+            for nct, study_obj in zip(to_fetch, fetch_pool.map(_fetch_study, to_fetch)):
                 study_cache[nct] = study_obj
-                existing_ncts.add(nct)
                 nct_fetched += 1
-            if study_obj is None:
-                continue
-
-            out_study = dict(study_obj)
-            out_study["cid"] = cid
-            _write_jsonl(studies_path, out_study)
 
-        if config.progress_every > 0 and (idx % config.progress_every == 0 or idx == total_cids):
-            log(
-                f"[stream] CID {idx}/{total_cids} processed: "
-                f"cid={cid}, nct_found={len(nct_ids)}, nct_fetched_total={nct_fetched}"
-            )
+            for nct in emit:
+                study_obj = study_cache.get(nct)
+                if study_obj is None:
+                    continue
+
+                # study_cache objects only feed this writer, so tag in place instead of
+                # copying; "cid" is overwritten for each CID that emits the study.
+                study_obj["cid"] = cid
+                studies_out.write(study_obj)
+
+            # Flush per CID so a resumed run never sees a half-written CID.
+            links_out.flush()
+            compounds_out.flush()
+            studies_out.flush()
+            csv_f.flush()
+
+            if config.progress_every > 0 and (
+                idx % config.progress_every == 0 or idx == total_cids
+            ):
+                log(
+                    f"[stream] CID {idx}/{total_cids} processed: "
+                    f"cid={cid}, nct_found={len(nct_ids)}, nct_fetched_total={nct_fetched}"
+                )
 
     elapsed = time.time() - t0
     return CollectCtgovDocsResult(
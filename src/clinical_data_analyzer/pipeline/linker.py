@@ -4,14 +4,51 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
 import re
 
 
+_WS_RE = re.compile(r"\s+")
+# One- and two-character synonyms (stereo prefixes, fragments) only produce false positives.
+_MIN_TERM_LEN = 3
+# Shared read-only default for missing sub-objects, so a miss allocates nothing.
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+
 def _norm_text(s: str) -> str:
-    s = s.casefold()
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+    return _WS_RE.sub(" ", s.casefold()).strip()
+
+
+@lru_cache(maxsize=4096)
+def _term_pattern(t: str) -> re.Pattern[str]:
+    # Synonyms repeat across CIDs (salts, brand names), so keep compiled patterns around.
+    return re.compile(r"(^|[^a-z0-9])" + re.escape(t) + r"([^a-z0-9]|$)")
+
+
+def _iter_blob_pieces(ps: Mapping[str, Any]) -> Iterator[str]:
+    """Yield the core protocolSection text: titles, status, conditions, interventions."""
+    ident = ps.get("identificationModule") or _EMPTY
+    for v in (
+        ident.get("briefTitle"),
+        ident.get("officialTitle"),
+        (ps.get("statusModule") or _EMPTY).get("overallStatus"),
+    ):
+        if isinstance(v, str):
+            yield v
+
+    conditions = (ps.get("conditionsModule") or _EMPTY).get("conditions")
+    if isinstance(conditions, list):
+        yield from (c for c in conditions if isinstance(c, str))
+
+    interventions = (ps.get("interventionsModule") or _EMPTY).get("interventions")
+    if isinstance(interventions, list):
+        for it in interventions:
+            if isinstance(it, dict):
+                name = it.get("name")
+                if isinstance(name, str):
+                    yield name
 
 
 @dataclass(frozen=True)
@@ -45,8 +82,8 @@ class CompoundTrialLinker:
         self.config = config or LinkerConfig()
 
     def _extract_nct_id(self, study_obj: Dict[str, Any]) -> Optional[str]:
-        ps = study_obj.get("protocolSection") or {}
-        ident = ps.get("identificationModule") or {}
+        ps = study_obj.get("protocolSection") or _EMPTY
+        ident = ps.get("identificationModule") or _EMPTY
         nct = ident.get("nctId")
         if isinstance(nct, str) and nct.strip():
             return nct.strip()
@@ -57,48 +94,28 @@ class CompoundTrialLinker:
         return None
 
     def _extract_text_blob(self, study_obj: Dict[str, Any]) -> str:
-        ps = study_obj.get("protocolSection") or {}
-
-        ident = ps.get("identificationModule") or {}
-        title = ident.get("briefTitle") or ""
-        official = ident.get("officialTitle") or ""
-
-        status = (ps.get("statusModule") or {}).get("overallStatus") or ""
-
-        conditions = (ps.get("conditionsModule") or {}).get("conditions") or []
-        if not isinstance(conditions, list):
-            conditions = []
-
-        im = ps.get("interventionsModule") or {}
-        interventions = im.get("interventions") or []
-        names: List[str] = []
-        if isinstance(interventions, list):
-            for it in interventions:
-                if not isinstance(it, dict):
-                    continue
-                name = it.get("name")
-                if isinstance(name, str):
-                    names.append(name)
-
-        pieces = [title, official, status, " ".join([c for c in conditions if isinstance(c, str)]), " ".join(names)]
-        return _norm_text(" ".join([p for p in pieces if isinstance(p, str)]))
+        ps = study_obj.get("protocolSection") or _EMPTY
+        return _norm_text(" ".join(p for p in _iter_blob_pieces(ps) if p))
 
     def _score(self, term: str, study_obj: Dict[str, Any]) -> Tuple[int, List[str]]:
-        reasons: List[str] = []
-        blob = self._extract_text_blob(study_obj)
-
         t = _norm_text(term)
-        score = 0
-
-        if t and t in blob:
-            score += 2
-            reasons.append("term_found_in_core_fields(+2)")
-
-        if t:
-            pattern = r"(^|[^a-z0-9])" + re.escape(t) + r"([^a-z0-9]|$)"
-            if re.search(pattern, blob):
-                score += 1
-                reasons.append("term_whole_word_match(+1)")
+        pattern = _term_pattern(t) if t else None
+        return self._score_with_blob(t, pattern, self._extract_text_blob(study_obj))
+
+    @staticmethod
+    def _score_with_blob(
+        t: str, pattern: Optional[re.Pattern[str]], blob: str
+    ) -> Tuple[int, List[str]]:
+        """Score a normalized term against a normalized study blob."""
+        if len(t) < _MIN_TERM_LEN or not blob or t not in blob:
+            # A whole-word match implies a substring match, so skip the regex on a miss.
+            return 0, []
+
+        score = 2
+        reasons = ["term_found_in_core_fields(+2)"]
+        if pattern is not None and pattern.search(blob):
+            score += 1
+            reasons.append("term_whole_word_match(+1)")
 
         return score, reasons
 
@@ -117,35 +134,58 @@ class CompoundTrialLinker:
         ):
             yield "term", s
 
-    def link_cid(self, cid: int) -> List[LinkResult]:
-        syns = self.pubchem.synonyms(cid, max_items=self.config.max_synonyms)
+    def link_cid(self, cid: int, synonyms: Optional[List[str]] = None) -> List[LinkResult]:
+        """
+        Link a CID to trials by searching CTGov for its synonyms.
+
+        ``synonyms`` may carry a prefetched list (e.g. from ``synonyms_batch``) to skip
+        the per-CID PubChem lookup.
+        """
+        if synonyms is None:
+            syns = self.pubchem.synonyms(cid, max_items=self.config.max_synonyms)
+        else:
+            syns = synonyms[: self.config.max_synonyms]
         props = self.pubchem.compound_properties(cid)
 
+        # Ordered dedup; O(1) membership for the IUPAC check below.
+        terms = dict.fromkeys(syns)
         iupac = props.get("IUPACName")
         if isinstance(iupac, str) and iupac.strip():
-            if len(iupac) <= 40 and iupac not in syns:
-                syns.insert(0, iupac.strip())
+            iupac = iupac.strip()
+            if len(iupac) <= 40 and iupac not in terms:
+                terms = {iupac: None, **terms}
 
         results: List[LinkResult] = []
         seen_pairs = set()
+        # The same trial comes back for both query modes and for several synonyms.
+        blobs: Dict[str, str] = {}
 
-        for term in syns:
+        for term in terms:
             term = term.strip()
             if not term:
                 continue
+            t = _norm_text(term)
+            if len(t) < _MIN_TERM_LEN and self.config.min_score > 0:
+                # Such terms always score 0, so don't spend CTGov queries on them.
+                continue
+            pattern = _term_pattern(t) if t else None
 
             for mode, study in self._iter_ctgov_by_term(term):
                 nct = self._extract_nct_id(study)
                 if not nct:
                     continue
 
-                score, reasons = self._score(term, study)
-                if score < self.config.min_score:
-                    continue
-
                 key = (cid, nct)
                 if key in seen_pairs:
                     continue
+
+                blob = blobs.get(nct)
+                if blob is None:
+                    blob = blobs[nct] = self._extract_text_blob(study)
+                score, reasons = self._score_with_blob(t, pattern, blob)
+                if score < self.config.min_score:
+                    continue
+
                 seen_pairs.add(key)
 
                 ev = LinkEvidence(term=term, query_mode=mode, score=score, reasons=reasons)
@@ -5,20 +5,23 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from typing import List
+import json
+
 import requests
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 
+from clinical_data_analyzer._http import PooledSessionMixin, response_snippet
+
 
 class PubChemClassificationError(RuntimeError):
     pass
 
 
 @dataclass(frozen=True)
-class PubChemClassificationClient:
+class PubChemClassificationClient(PooledSessionMixin):
     base_url: str = "https://pubchem.ncbi.nlm.nih.gov/rest/pug/classification"
     timeout: float = 60.0
     user_agent: str = "clinical-data-pipeline/0.1 (magicai-labs)"
-
     def _headers(self) -> dict:
         return {"User-Agent": self.user_agent}
 
@@ -29,10 +32,12 @@ class PubChemClassificationClient:
         reraise=True,
     )
     def _get_with_retry(self, url: str) -> requests.Response:
-        r = requests.get(url, headers=self._headers(), timeout=self.timeout)
+        r = self._session().get(url, headers=self._headers(), timeout=self.timeout)
         # Retry only for transient/server-busy classes.
         if r.status_code in (429, 500, 502, 503, 504):
-            raise requests.RequestException(f"Transient HTTP {r.status_code} for {url}: {r.text[:300]}")
+            raise requests.RequestException(
+                f"Transient HTTP {r.status_code} for {url}: {response_snippet(r, 300)}"
+            )
         return r
 
     def get_ids(self, hnid: int, id_type: str = "cids", fmt: str = "TXT") -> List[int]:
@@ -50,20 +55,22 @@ class PubChemClassificationClient:
 
         r = self._get_with_retry(url)
         if r.status_code != 200:
-            raise PubChemClassificationError(f"HTTP {r.status_code} for {url}: {r.text[:300]}")
+            raise PubChemClassificationError(
+                f"HTTP {r.status_code} for {url}: {response_snippet(r, 300)}"
+            )
 
         if fmt == "TXT":
-            # For cids this returns one per line
-            vals = []
-            for x in r.text.split():
-                x = x.strip()
-                if x.isdigit():
-                    vals.append(int(x))
-            return vals
+            # For cids this returns one per line; parse the raw bytes without decoding.
+            tokens = r.content.split()
+            try:
+                return list(map(int, tokens))
+            except ValueError:
+                # Non-numeric id types (e.g. patents): keep only the integer tokens.
+                return [int(x) for x in tokens if x.isdigit()]
 
         if fmt == "JSON":
             # Common structure for CID list: {"IdentifierList": {"CID":[...]}}
-            data = r.json()
+            data = json.loads(r.content)
             key = "CID" if "cid" in id_type else None
             if key:
                 ids = data.get("IdentifierList", {}).get(key, []) or []
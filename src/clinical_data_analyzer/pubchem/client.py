@@ -3,61 +3,108 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+import json
+from urllib.parse import quote
 
 import requests
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+
+from clinical_data_analyzer._cache import LruCache
+from clinical_data_analyzer._http import PooledSessionMixin, response_snippet, retry_with_timeouts
 
 
 class PubChemError(RuntimeError):
     pass
 
 
+_PROPERTY_NAMES = "CanonicalSMILES,ConnectivitySMILES,InChIKey,IUPACName"
+
+
+@lru_cache(maxsize=4096)
+def _quote_name(name: str) -> str:
+    return quote(name)
+
+
+def _decode_json(r: requests.Response, url: str) -> Dict[str, Any]:
+    try:
+        # Parse the raw bytes; skips requests' charset sniffing and str decode.
+        return json.loads(r.content)
+    except ValueError as e:
+        raise PubChemError(f"Invalid JSON response for {url}: {response_snippet(r)}") from e
+
+
 @dataclass(frozen=True)
-class PubChemClient:
+class PubChemClient(PooledSessionMixin):
     base_url: str = "https://pubchem.ncbi.nlm.nih.gov/rest/pug"
     timeout: float = 30.0
     user_agent: str = "clinical-data-pipeline/0.1 (magicai-labs)"
+    # Per-client memo: the linker and dataset builder both ask for the same CID's properties.
+    _props_cache: LruCache = field(
+        default_factory=LruCache, init=False, repr=False, compare=False
+    )
 
-    def _session(self) -> requests.Session:
-        s = requests.Session()
-        s.headers.update({"User-Agent": self.user_agent})
-        return s
+    def _request_json(self, method: str, url: str, timeout: float, **kwargs: Any) -> Dict[str, Any]:
+        r = getattr(self._session(), method)(url, timeout=timeout, **kwargs)
+        try:
+            r.raise_for_status()
+        except requests.HTTPError as e:
+            raise PubChemError(f"HTTP {r.status_code} for {url}: {response_snippet(r)}") from e
+        return _decode_json(r, url)
 
-    @retry(
-        reraise=True,
-        stop=stop_after_attempt(5),
-        wait=wait_exponential(multiplier=0.5, min=0.5, max=8),
-        retry=retry_if_exception_type((requests.RequestException,)),
-    )
     def _get_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        with self._session() as s:
-            r = s.get(url, params=params, timeout=self.timeout)
-            try:
-                r.raise_for_status()
-            except requests.HTTPError as e:
-                raise PubChemError(f"HTTP {r.status_code} for {url}: {r.text[:500]}") from e
-            return r.json()
+        return retry_with_timeouts(
+            lambda timeout: self._request_json("get", url, timeout, params=params), self.timeout
+        )
+
+    def _post_json(self, url: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        return retry_with_timeouts(
+            lambda timeout: self._request_json("post", url, timeout, data=data), self.timeout
+        )
 
     def cids_by_name(self, name: str) -> List[int]:
-        url = f"{self.base_url}/compound/name/{requests.utils.quote(name)}/cids/JSON"
+        url = f"{self.base_url}/compound/name/{_quote_name(name)}/cids/JSON"
         data = self._get_json(url)
         cids = data.get("IdentifierList", {}).get("CID", []) or []
         return [int(x) for x in cids]
 
     def compound_properties(self, cid: int) -> Dict[str, Any]:
-        props = "CanonicalSMILES,ConnectivitySMILES,InChIKey,IUPACName"
-        url = f"{self.base_url}/compound/cid/{cid}/property/{props}/JSON"
+        cached = self._props_cache.get(cid)
+        if cached is None:
+            cached = self._fetch_compound_properties(cid)
+            self._props_cache.put(cid, cached)
+        return dict(cached)
+
+    def _fetch_compound_properties(self, cid: int) -> Dict[str, Any]:
+        url = f"{self.base_url}/compound/cid/{cid}/property/{_PROPERTY_NAMES}/JSON"
         data = self._get_json(url)
         rows = data.get("PropertyTable", {}).get("Properties", []) or []
         if not rows:
             raise PubChemError(f"No properties for CID {cid}")
-        row = rows[0]
-        # Some CIDs return ConnectivitySMILES only. Normalize to CanonicalSMILES key.
-        if isinstance(row, dict) and not row.get("CanonicalSMILES") and row.get("ConnectivitySMILES"):
-            row["CanonicalSMILES"] = row.get("ConnectivitySMILES")
-        return row
+        return _normalize_properties_row(rows[0])
+
+    def compound_properties_bulk(
+        self, cids: Sequence[int], chunk: int = 200
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        CID list -> {CID: properties}, one POST per ``chunk`` CIDs.
+
+        Results also warm the per-CID cache, so later ``compound_properties`` calls for
+        these CIDs are free. CIDs without a property row are absent from the result.
+        """
+        url = f"{self.base_url}/compound/cid/property/{_PROPERTY_NAMES}/JSON"
+        out: Dict[int, Dict[str, Any]] = {}
+        for i in range(0, len(cids), chunk):
+            batch = cids[i : i + chunk]
+            data = self._post_json(url, {"cid": ",".join(str(int(c)) for c in batch)})
+            for row in data.get("PropertyTable", {}).get("Properties", []) or []:
+                cid = row.get("CID") if isinstance(row, dict) else None
+                if isinstance(cid, int):
+                    props = _normalize_properties_row(row)
+                    self._props_cache.put(cid, props)
+                    out[cid] = dict(props)
+        return out
 
     def synonyms(self, cid: int, max_items: int = 50) -> List[str]:
         url = f"{self.base_url}/compound/cid/{cid}/synonyms/JSON"
@@ -65,18 +112,45 @@ class PubChemClient:
         info = data.get("InformationList", {}).get("Information", [])
         if not info:
             return []
-        arr = info[0].get("Synonym", []) or []
-
-        seen = set()
-        out: List[str] = []
-        for s in arr:
-            if not isinstance(s, str):
-                continue
-            t = s.strip()
-            if not t or t in seen:
-                continue
-            seen.add(t)
-            out.append(t)
-            if len(out) >= max_items:
-                break
+        return _dedup_synonyms(info[0].get("Synonym", []) or [], max_items)
+
+    def synonyms_batch(self, cids: Sequence[int], max_items: int = 50) -> Dict[int, List[str]]:
+        """
+        CID list -> {CID: synonyms} in one request.
+
+        The CID list is POSTed as a form field, so long batches do not hit URL
+        length limits. CIDs that PubChem does not return are absent from the result.
+        """
+        if not cids:
+            return {}
+        url = f"{self.base_url}/compound/cid/synonyms/JSON"
+        data = self._post_json(url, {"cid": ",".join(str(int(c)) for c in cids)})
+        out: Dict[int, List[str]] = {}
+        for info in data.get("InformationList", {}).get("Information", []) or []:
+            cid = info.get("CID")
+            if isinstance(cid, int):
+                out[cid] = _dedup_synonyms(info.get("Synonym", []) or [], max_items)
         return out
+
+
+def _normalize_properties_row(row: Any) -> Dict[str, Any]:
+    # Some CIDs return ConnectivitySMILES only. Normalize to CanonicalSMILES key.
+    if isinstance(row, dict) and not row.get("CanonicalSMILES") and row.get("ConnectivitySMILES"):
+        row["CanonicalSMILES"] = row.get("ConnectivitySMILES")
+    return row
+
+
+def _dedup_synonyms(arr: List[Any], max_items: int) -> List[str]:
+    seen = set()
+    out: List[str] = []
+    for s in arr:
+        if not isinstance(s, str):
+            continue
+        t = s.strip()
+        if not t or t in seen:
+            continue
+        seen.add(t)
+        out.append(t)
+        if len(out) >= max_items:
+            break
+    return out
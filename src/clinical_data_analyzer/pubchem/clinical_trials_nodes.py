@@ -3,6 +3,7 @@
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List
@@ -27,9 +28,9 @@ class ClinicalTrialsNodeSet:
 def save_cids_txt(cids: List[int], path: str | Path) -> Path:
     p = Path(path)
     p.parent.mkdir(parents=True, exist_ok=True)
-    with p.open("w", encoding="utf-8") as f:
-        for cid in cids:
-            f.write(f"{cid}\n")
+    # One buffer, one write: HNID lists can hold hundreds of thousands of CIDs.
+    text = "\n".join(map(str, cids))
+    p.write_bytes((text + "\n" if text else "").encode("ascii"))
     return p
 
 
@@ -56,7 +57,6 @@ def download_clinical_trials_cids(
       - "japan_niph"
     """
     nodes = ClinicalTrialsNodeSet()
-    client = PubChemClassificationClient()
     out_dir = Path(out_dir)
 
     results: Dict[str, List[int]] = {}
@@ -73,9 +73,12 @@ def download_clinical_trials_cids(
             }
         )
 
-    for name, hnid in mapping.items():
-        cids = client.get_cids(hnid, fmt="TXT")
-        results[name] = cids
-        save_cids_txt(cids, out_dir / f"{name}_cids.txt")
+    # The HNID downloads are independent; fetch them concurrently and keep the
+    # mapping order for the results.
+    with PubChemClassificationClient() as client, ThreadPoolExecutor(len(mapping)) as ex:
+        fetched = ex.map(lambda hnid: client.get_cids(hnid, fmt="TXT"), mapping.values())
+        for name, cids in zip(mapping, fetched):
+            results[name] = cids
+            save_cids_txt(cids, out_dir / f"{name}_cids.txt")
 
     return results
@@ -3,12 +3,18 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple
+import json
 import re
+import threading
+from urllib.parse import quote
 
 import requests
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+
+from clinical_data_analyzer._cache import HttpCache, LruCache
+from clinical_data_analyzer._http import PooledSessionMixin, response_snippet, retry_with_timeouts
 
 from .web_fallback import PubChemWebFallbackClient, PubChemWebFallbackError
 
@@ -26,145 +32,200 @@ DRUG_MED_INFO_RE = re.compile(
 )
 
 
-def _walk(obj: Any) -> Iterable[Any]:
-    if isinstance(obj, dict):
-        for v in obj.values():
-            yield v
-            yield from _walk(v)
-    elif isinstance(obj, list):
-        for v in obj:
-            yield v
-            yield from _walk(v)
-
-
-def _extract_urls(value: Any) -> Iterable[str]:
-    for x in _walk(value):
-        if isinstance(x, dict) and "URL" in x and isinstance(x["URL"], str):
-            yield x["URL"]
-
-
-def _extract_nct_ids_from_text(text: str) -> Set[str]:
-    return {m.group(0).upper() for m in NCT_RE.finditer(text or "")}
-
-
-def _extract_nct_ids_from_payload(payload: Any) -> Set[str]:
-    ncts: Set[str] = set()
-
-    for url in _extract_urls(payload):
-        if CTGOV_HOST_RE.search(url):
-            ncts |= _extract_nct_ids_from_text(url)
-
-    for x in _walk(payload):
-        if isinstance(x, str) and ("nct" in x.lower() or "clinicaltrials.gov" in x.lower()):
-            ncts |= _extract_nct_ids_from_text(x)
-
-    return ncts
-
-
-def _has_external_clinical_trials_ref(payload: Any) -> bool:
-    for x in _walk(payload):
-        if isinstance(x, dict):
+# Heading lookups in the order they are tried; the first two carry nearly all hits.
+PRIORITY_CLINICAL_HEADINGS = (
+    "ClinicalTrials.gov",
+    "Drug and Medication Information",
+    "Clinical Trials",
+    "ClinicalTrials",
+    "Drug-and-Medication-Information",
+)
+DEFAULT_CLINICAL_HEADINGS = frozenset(PRIORITY_CLINICAL_HEADINGS)
+_HEADING_KEYS = ("TOCHeading", "Name", "Heading", "Title")
+
+
+@lru_cache(maxsize=256)
+def _quote_heading(heading: str) -> str:
+    return quote(heading, safe="")
+
+
+def _analyze_payload(payload: Any) -> Tuple[Set[str], bool, Set[str]]:
+    """
+    Scan a PUG-View payload in a single iterative pass.
+
+    Returns (NCT IDs found in string values, whether an ExternalTableName points at
+    clinical trials, clinical-trial-like section headings not already in
+    DEFAULT_CLINICAL_HEADINGS). Like the old per-purpose walks, only nodes below the
+    root are inspected.
+    """
+    found: Set[str] = set()
+    headings: Set[str] = set()
+    has_external_ref = False
+
+    if isinstance(payload, dict):
+        stack = list(payload.values())
+    elif isinstance(payload, list):
+        stack = list(payload)
+    else:
+        return found, has_external_ref, headings
+
+    # Bound methods hoisted out of the loop; it runs once per node of large records.
+    pop, push = stack.pop, stack.extend
+    nct_findall = NCT_RE.findall
+    ct_search = CLINICAL_TRIALS_RE.search
+    dmi_search = DRUG_MED_INFO_RE.search
+    add_ncts, add_heading = found.update, headings.add
+    seed = DEFAULT_CLINICAL_HEADINGS
+
+    while stack:
+        x = pop()
+        if isinstance(x, str):
+            # URL values are strings too, so this also covers clinicaltrials.gov links.
+            # No lower()-based prefilter: the regex rejects non-matching strings more cheaply.
+            add_ncts(nct_findall(x))
+        elif isinstance(x, dict):
             name = x.get("ExternalTableName")
-            if isinstance(name, str) and CLINICAL_TRIALS_RE.search(name):
-                return True
-    return False
-
-
-def _candidate_clinical_headings(payload: Any) -> Set[str]:
-    out: Set[str] = set()
-    out.update(
-        {
-            "ClinicalTrials.gov",
-            "Clinical Trials",
-            "ClinicalTrials",
-            "Drug and Medication Information",
-            "Drug-and-Medication-Information",
-        }
-    )
-
-    for x in _walk(payload):
-        if not isinstance(x, dict):
-            continue
-        for key in ("TOCHeading", "Name", "Heading", "Title"):
-            val = x.get(key)
-            if isinstance(val, str) and (
-                CLINICAL_TRIALS_RE.search(val) or DRUG_MED_INFO_RE.search(val)
-            ):
-                out.add(val.strip())
-    return out
+            if isinstance(name, str) and ct_search(name):
+                has_external_ref = True
+            for key in _HEADING_KEYS:
+                val = x.get(key)
+                if isinstance(val, str) and (ct_search(val) or dmi_search(val)):
+                    val = val.strip()
+                    if val not in seed:
+                        add_heading(val)
+            push(x.values())
+        elif isinstance(x, list):
+            push(x)
+
+    # Records repeat IDs across sections; upper-case each distinct match once.
+    return {v.upper() for v in found}, has_external_ref, headings
 
 
 @dataclass(frozen=True)
-class PubChemPugViewClient:
+class PubChemPugViewClient(PooledSessionMixin):
     base_url: str = "https://pubchem.ncbi.nlm.nih.gov/rest/pug_view"
     timeout: float = 60.0
     user_agent: str = "clinical-data-pipeline/0.1 (magicai-labs)"
     use_web_fallback: bool = True
+    # Upper bound on per-heading requests per CID (None: try every candidate heading).
+    max_heading_lookups: Optional[int] = None
+    # Optional on-disk cache of raw PUG-View records; warm runs skip the network.
+    record_cache: Optional[HttpCache] = field(default=None, repr=False, compare=False)
+    # Per-client memo keyed by (CID, web fallback client); overlapping HNIDs map the
+    # same CID more than once.
+    _nct_cache: LruCache = field(
+        default_factory=LruCache, init=False, repr=False, compare=False
+    )
+    # Web fallback client built on first use and kept, so its session is reused across CIDs.
+    _web_fallback: Optional[PubChemWebFallbackClient] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _web_fallback_lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
 
-    def _session(self) -> requests.Session:
-        s = requests.Session()
-        s.headers.update({"User-Agent": self.user_agent})
-        return s
+    def close(self) -> None:
+        super().close()
+        if self._web_fallback is not None:
+            self._web_fallback.close()
+
+    def _default_web_fallback(self) -> PubChemWebFallbackClient:
+        with self._web_fallback_lock:
+            if self._web_fallback is None:
+                client = PubChemWebFallbackClient(timeout=self.timeout, user_agent=self.user_agent)
+                object.__setattr__(self, "_web_fallback", client)
+            return self._web_fallback
+
+    def _get_json(self, url: str, timeout: float) -> Dict[str, Any]:
+        r = self._session().get(url, timeout=timeout)
+        try:
+            r.raise_for_status()
+        except requests.HTTPError as e:
+            raise PubChemPugViewError(
+                f"HTTP {r.status_code} for {url}: {response_snippet(r)}"
+            ) from e
+        try:
+            # Parse the raw bytes; skips requests' charset sniffing and str decode.
+            return json.loads(r.content)
+        except ValueError as e:
+            raise PubChemPugViewError(
+                f"Invalid JSON response for {url}: {response_snippet(r)}"
+            ) from e
+
+    def _fetch_record(self, url: str) -> Dict[str, Any]:
+        return retry_with_timeouts(lambda timeout: self._get_json(url, timeout), self.timeout)
+
+    def _cached_record(self, endpoint: str, key: str, url: str, fetch) -> Dict[str, Any]:
+        cache = self.record_cache
+        if cache is None:
+            return fetch(url)
+        hit = cache.get(endpoint, key)
+        if hit is not None:
+            return hit
+        payload = fetch(url)
+        cache.put(endpoint, key, payload)
+        return payload
 
-    @retry(
-        reraise=True,
-        stop=stop_after_attempt(5),
-        wait=wait_exponential(multiplier=0.5, min=0.5, max=8),
-        retry=retry_if_exception_type((requests.RequestException,)),
-    )
     def get_compound_record(self, cid: int) -> Dict[str, Any]:
         url = f"{self.base_url}/data/compound/{cid}/JSON/?response_type=display"
-        with self._session() as s:
-            r = s.get(url, timeout=self.timeout)
-            try:
-                r.raise_for_status()
-            except requests.HTTPError as e:
-                raise PubChemPugViewError(f"HTTP {r.status_code} for {url}: {r.text[:500]}") from e
-            return r.json()
-
-    @retry(
-        reraise=True,
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=0.5, min=0.5, max=4),
-        retry=retry_if_exception_type((requests.RequestException,)),
-    )
+        return self._cached_record("pug_view.record", str(cid), url, self._fetch_record)
+
+    def _fetch_section(self, url: str) -> Dict[str, Any]:
+        return retry_with_timeouts(
+            lambda timeout: self._get_json(url, timeout), self.timeout, attempts=3, max_wait=4
+        )
+
     def get_compound_record_by_heading(self, cid: int, heading: str) -> Dict[str, Any]:
-        enc = requests.utils.quote(heading, safe="")
+        enc = _quote_heading(heading)
         url = f"{self.base_url}/data/compound/{cid}/JSON/?heading={enc}&response_type=display"
-        with self._session() as s:
-            r = s.get(url, timeout=self.timeout)
-            try:
-                r.raise_for_status()
-            except requests.HTTPError as e:
-                raise PubChemPugViewError(f"HTTP {r.status_code} for {url}: {r.text[:500]}") from e
-            return r.json()
+        return self._cached_record("pug_view.heading", f"{cid}|{heading}", url, self._fetch_section)
 
     def nct_ids_for_cid_with_source(
         self,
         cid: int,
         *,
         web_fallback_client: Optional[PubChemWebFallbackClient] = None,
+    ) -> Tuple[List[str], str]:
+        # The fallback client is part of the key: a different one can change the result.
+        key = (cid, web_fallback_client)
+        cached = self._nct_cache.get(key)
+        if cached is None:
+            ncts, source = self._lookup_nct_ids(cid, web_fallback_client=web_fallback_client)
+            cached = (tuple(ncts), source)
+            self._nct_cache.put(key, cached)
+        return list(cached[0]), cached[1]
+
+    def _lookup_nct_ids(
+        self,
+        cid: int,
+        *,
+        web_fallback_client: Optional[PubChemWebFallbackClient] = None,
     ) -> Tuple[List[str], str]:
         payload = self.get_compound_record(cid)
-        ncts = _extract_nct_ids_from_payload(payload)
+        ncts, has_external_ref, headings = _analyze_payload(payload)
+        del payload
         source = "PubChem PUG-View annotations"
 
         # Some compounds reference ClinicalTrials data via external tables.
         # In those cases, direct NCT IDs may be absent in the default payload.
-        needs_heading_lookup = (not ncts) or _has_external_clinical_trials_ref(payload)
+        needs_heading_lookup = (not ncts) or has_external_ref
         if needs_heading_lookup:
-            for heading in sorted(_candidate_clinical_headings(payload)):
+            candidates = PRIORITY_CLINICAL_HEADINGS + tuple(sorted(headings))
+            if self.max_heading_lookups is not None:
+                candidates = candidates[: self.max_heading_lookups]
+            for heading in candidates:
                 try:
                     section_payload = self.get_compound_record_by_heading(cid, heading)
                 except PubChemPugViewError:
                     continue
-                ncts |= _extract_nct_ids_from_payload(section_payload)
+                found = _analyze_payload(section_payload)[0]
+                if found:
+                    # Candidates are mostly aliases of the same sections; stop at the first hit.
+                    ncts |= found
+                    break
 
         if not ncts and self.use_web_fallback:
-            fallback = web_fallback_client or PubChemWebFallbackClient(
-                timeout=self.timeout,
-                user_agent=self.user_agent,
-            )
+            fallback = web_fallback_client or self._default_web_fallback()
             try:
                 if hasattr(fallback, "nct_ids_for_cid_with_source"):
                     fallback_ncts, fallback_source = fallback.nct_ids_for_cid_with_source(cid)
@@ -3,7 +3,10 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Sequence, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import threading
 
 from .base import PubChemWebFallbackBaseClient
 from .common import (
@@ -12,26 +15,62 @@ from .common import (
     SDQ_COLLECTION_EU_REGISTER,
     SDQ_COLLECTION_JAPAN_NIPH,
     align_rows_to_union_schema,
+    extract_nct_ids_from_bytes,
     extract_nct_ids_from_html,
     extract_nct_ids_from_sdq_payload,
     extract_sdq_rows,
+    get_normalized_trials_for,
+    get_sdq_payload_for,
     normalize_sdq_trial_row,
     normalize_sdq_trial_row_union,
 )
-from .ctgov import get_ctgov_normalized_trials, get_ctgov_sdq_payload
-from .eu_ctr import get_eu_normalized_trials, get_eu_sdq_payload
-from .jp_niph import get_jp_normalized_trials, get_jp_sdq_payload
 
 
+# SDQ collections scanned for NCT IDs, in priority order, with the source label reported.
+SDQ_NCT_SOURCES: Tuple[Tuple[str, str], ...] = (
+    (SDQ_COLLECTION_CLINICALTRIALS, "PubChem web clinicaltrials endpoint fallback (sdq)"),
+    (SDQ_COLLECTION_EU_REGISTER, "PubChem web EU Clinical Trials Register endpoint fallback (sdq)"),
+    (
+        SDQ_COLLECTION_JAPAN_NIPH,
+        "PubChem web NIPH Clinical Trials Search of Japan endpoint fallback (sdq)",
+    ),
+)
+
+
+# Shared by every CID the client handles; callers often run several CIDs at once.
+SDQ_POOL_WORKERS = 8
+
+
+@dataclass(frozen=True)
 class PubChemWebFallbackClient(PubChemWebFallbackBaseClient):
+    # Worker pool for concurrent SDQ requests, started on first use and stopped by close().
+    _pool: Optional[ThreadPoolExecutor] = field(default=None, init=False, repr=False, compare=False)
+    _pool_lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                pool = ThreadPoolExecutor(max_workers=SDQ_POOL_WORKERS, thread_name_prefix="sdq")
+                object.__setattr__(self, "_pool", pool)
+            return self._pool
+
+    def close(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                object.__setattr__(self, "_pool", None)
+        super().close()
+
     def get_clinicaltrials_sdq_payload(self, cid: int, *, limit: int = 200) -> Dict[str, Any]:
-        return get_ctgov_sdq_payload(self, cid, limit=limit)
+        return get_sdq_payload_for(self, cid, collection=SDQ_COLLECTION_CLINICALTRIALS, limit=limit)
 
     def get_eu_register_sdq_payload(self, cid: int, *, limit: int = 200) -> Dict[str, Any]:
-        return get_eu_sdq_payload(self, cid, limit=limit)
+        return get_sdq_payload_for(self, cid, collection=SDQ_COLLECTION_EU_REGISTER, limit=limit)
 
     def get_japan_niph_sdq_payload(self, cid: int, *, limit: int = 200) -> Dict[str, Any]:
-        return get_jp_sdq_payload(self, cid, limit=limit)
+        return get_sdq_payload_for(self, cid, collection=SDQ_COLLECTION_JAPAN_NIPH, limit=limit)
 
     # Backward-compatible wrappers
     def get_clinicaltrials_eu_sdq_payload(self, cid: int, *, limit: int = 200) -> Dict[str, Any]:
@@ -47,16 +86,7 @@ class PubChemWebFallbackClient(PubChemWebFallbackBaseClient):
         collection: str = SDQ_COLLECTION_CLINICALTRIALS,
         limit: int = 200,
     ) -> List[Dict[str, Any]]:
-        if collection == SDQ_COLLECTION_CLINICALTRIALS:
-            return get_ctgov_normalized_trials(self, cid, limit=limit)
-        if collection == SDQ_COLLECTION_EU_REGISTER:
-            return get_eu_normalized_trials(self, cid, limit=limit)
-        if collection == SDQ_COLLECTION_JAPAN_NIPH:
-            return get_jp_normalized_trials(self, cid, limit=limit)
-
-        payload = self.get_sdq_payload(cid, collection=collection, limit=limit)
-        rows = extract_sdq_rows(payload)
-        return [normalize_sdq_trial_row(r, collection=collection) for r in rows]
+        return get_normalized_trials_for(self, cid, collection=collection, limit=limit)
 
     def get_normalized_trials_union(
         self,
@@ -69,40 +99,44 @@ class PubChemWebFallbackClient(PubChemWebFallbackBaseClient):
         ),
         limit_per_collection: int = 200,
     ) -> Tuple[List[Dict[str, Any]], List[str]]:
+        def _fetch(collection: str) -> Dict[str, Any]:
+            return self.get_sdq_payload(cid, collection=collection, limit=limit_per_collection)
+
+        # The collections are independent requests; rows are still merged in collection order.
         merged: List[Dict[str, Any]] = []
-        for collection in collections:
-            payload = self.get_sdq_payload(cid, collection=collection, limit=limit_per_collection)
+        for collection, payload in zip(collections, self._executor().map(_fetch, collections)):
             rows = extract_sdq_rows(payload)
             merged.extend(normalize_sdq_trial_row_union(r, collection=collection) for r in rows)
         return align_rows_to_union_schema(merged)
 
+    def sdq_nct_ids(self, cid: int, collection: str, *, limit: int = 200) -> List[str]:
+        """NCT IDs from one SDQ collection, scanned from the raw response body."""
+        body = self.get_sdq_bytes(cid, collection=collection, limit=limit)
+        return extract_nct_ids_from_bytes(body)
+
     def nct_ids_for_cid_with_source(self, cid: int) -> Tuple[List[str], str]:
+        # Only NCT IDs are needed here, so scan raw bodies instead of building JSON/str objects.
+        (primary, primary_source), *registry_sources = SDQ_NCT_SOURCES
         try:
-            sdq_payload = self.get_clinicaltrials_sdq_payload(cid)
-            sdq_ncts = extract_nct_ids_from_sdq_payload(sdq_payload)
+            sdq_ncts = self.sdq_nct_ids(cid, primary)
             if sdq_ncts:
-                return sdq_ncts, "PubChem web clinicaltrials endpoint fallback (sdq)"
-        except PubChemWebFallbackError:
-            pass
-
-        try:
-            eu_payload = self.get_eu_register_sdq_payload(cid)
-            eu_ncts = extract_nct_ids_from_sdq_payload(eu_payload)
-            if eu_ncts:
-                return eu_ncts, "PubChem web EU Clinical Trials Register endpoint fallback (sdq)"
-        except PubChemWebFallbackError:
-            pass
-
-        try:
-            jp_payload = self.get_japan_niph_sdq_payload(cid)
-            jp_ncts = extract_nct_ids_from_sdq_payload(jp_payload)
-            if jp_ncts:
-                return jp_ncts, "PubChem web NIPH Clinical Trials Search of Japan endpoint fallback (sdq)"
+                return sdq_ncts, primary_source
         except PubChemWebFallbackError:
             pass
 
-        html = self.get_compound_page_html(cid)
-        html_ncts = extract_nct_ids_from_html(html)
+        # The registry collections only matter once clinicaltrials.gov came up empty; they are
+        # independent, so query them together and still take results in priority order.
+        submit = self._executor().submit
+        futures = [(submit(self.sdq_nct_ids, cid, c), source) for c, source in registry_sources]
+        for fut, source in futures:
+            try:
+                ncts = fut.result()
+            except PubChemWebFallbackError:
+                continue
+            if ncts:
+                return ncts, source
+
+        html_ncts = extract_nct_ids_from_bytes(self.get_compound_page_bytes(cid))
         if html_ncts:
             return html_ncts, "PubChem web compound page fallback (html)"
         return [], "PubChem web fallback (empty)"
@@ -118,6 +152,8 @@ __all__ = [
     "SDQ_COLLECTION_CLINICALTRIALS",
     "SDQ_COLLECTION_EU_REGISTER",
     "SDQ_COLLECTION_JAPAN_NIPH",
+    "SDQ_NCT_SOURCES",
+    "extract_nct_ids_from_bytes",
     "extract_nct_ids_from_html",
     "extract_nct_ids_from_sdq_payload",
     "extract_sdq_rows",
@@ -3,13 +3,17 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Dict, Optional, Sequence
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Sequence, Tuple
 import json
+import threading
 
 import requests
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 
+from clinical_data_analyzer._http import PooledSessionMixin, response_snippet
+
 from .common import (
     PubChemWebFallbackError,
     SDQ_COLLECTION_CLINICALTRIALS,
@@ -18,16 +22,45 @@ from .common import (
 )
 
 
+_TRANSIENT_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+class _TransientHTTPError(requests.RequestException):
+    """Retryable HTTP status; carries the response for the final error message."""
+
+    def __init__(self, response: requests.Response):
+        super().__init__(f"Transient HTTP {response.status_code}", response=response)
+
+
+_compact_json = json.JSONEncoder(separators=(",", ":")).encode
+
+# Same text json.dumps(query_obj, separators=(",", ":")) produced for the SDQ query dict,
+# filled in directly so each request skips building and encoding the nested object.
+_SDQ_QUERY_TEMPLATE = (
+    '{{"select":"*","collection":{collection},"order":{order},"start":1,"limit":{limit},'
+    '"nullatbottom":1,"where":{{"ands":[{{"cid":{cid}}}]}},"width":1000000}}'
+)
+_ORDER_BY_DATE = _compact_json(["date,desc"])
+_ORDER_BY_UPDATEDATE = _compact_json(["updatedate,desc"])
+
+
 @dataclass(frozen=True)
-class PubChemWebFallbackBaseClient:
+class PubChemWebFallbackBaseClient(PooledSessionMixin):
     base_url: str = "https://pubchem.ncbi.nlm.nih.gov"
     timeout: float = 60.0
     user_agent: str = "clinical-data-pipeline/0.1 (magicai-labs)"
-
-    def _session(self) -> requests.Session:
-        s = requests.Session()
-        s.headers.update({"User-Agent": self.user_agent})
-        return s
+    # Byte budget for the most recent response bodies kept in memory (0 disables), so the
+    # NCT lookup and the trials export for the same CID share one request per SDQ
+    # collection / page. Compound pages run to megabytes; a body larger than the whole
+    # budget is not kept.
+    body_cache_bytes: int = 4 * 1024 * 1024
+    _bodies: "OrderedDict[Tuple[Any, ...], bytes]" = field(
+        default_factory=OrderedDict, init=False, repr=False, compare=False
+    )
+    _bodies_nbytes: int = field(default=0, init=False, repr=False, compare=False)
+    _bodies_lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
 
     @retry(
         reraise=True,
@@ -35,22 +68,84 @@ class PubChemWebFallbackBaseClient:
         wait=wait_exponential(multiplier=0.5, min=0.5, max=4),
         retry=retry_if_exception_type((requests.RequestException,)),
     )
+    def _get_with_retry(
+        self, url: str, params: Optional[Dict[str, Any]] = None
+    ) -> requests.Response:
+        r = self._session().get(url, params=params, timeout=self.timeout)
+        # Retry server-busy statuses too, not just connection errors.
+        if r.status_code in _TRANSIENT_STATUS:
+            raise _TransientHTTPError(r)
+        return r
+
+    def _get(self, url: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
+        try:
+            r = self._get_with_retry(url, params)
+        except _TransientHTTPError as e:
+            r = e.response
+        try:
+            r.raise_for_status()
+        except requests.HTTPError as e:
+            raise PubChemWebFallbackError(
+                f"HTTP {r.status_code} for {url}: {response_snippet(r)}"
+            ) from e
+        return r
+
+    def _get_body(self, url: str, params: Optional[Dict[str, Any]] = None) -> bytes:
+        key = (url, tuple(params.items()) if params else ())
+        with self._bodies_lock:
+            body = self._bodies.get(key)
+            if body is not None:
+                self._bodies.move_to_end(key)
+                return body
+        body = self._get(url, params).content
+        if len(body) <= self.body_cache_bytes:
+            with self._bodies_lock:
+                old = self._bodies.pop(key, None)
+                nbytes = self._bodies_nbytes + len(body) - (len(old) if old is not None else 0)
+                self._bodies[key] = body
+                while nbytes > self.body_cache_bytes:
+                    nbytes -= len(self._bodies.popitem(last=False)[1])
+                object.__setattr__(self, "_bodies_nbytes", nbytes)
+        return body
+
+    def clear_cache(self) -> None:
+        with self._bodies_lock:
+            self._bodies.clear()
+            object.__setattr__(self, "_bodies_nbytes", 0)
+
     def get_compound_page_html(self, cid: int) -> str:
-        url = f"{self.base_url}/compound/{cid}"
-        with self._session() as s:
-            r = s.get(url, timeout=self.timeout)
-            try:
-                r.raise_for_status()
-            except requests.HTTPError as e:
-                raise PubChemWebFallbackError(f"HTTP {r.status_code} for {url}: {r.text[:500]}") from e
-            return r.text
+        # PubChem serves UTF-8; decoding directly skips requests' charset detection.
+        return self.get_compound_page_bytes(cid).decode("utf-8", errors="replace")
+
+    def get_compound_page_bytes(self, cid: int) -> bytes:
+        """Raw compound page, for callers that only regex-scan it (no charset detection/decode)."""
+        return self._get_body(f"{self.base_url}/compound/{cid}")
+
+    def _sdq_request(
+        self,
+        cid: int,
+        collection: str,
+        limit: int,
+        order: Optional[Sequence[str]],
+    ) -> Tuple[str, Dict[str, Any]]:
+        if order is None:
+            order_json = (
+                _ORDER_BY_DATE
+                if collection in (SDQ_COLLECTION_EU_REGISTER, SDQ_COLLECTION_JAPAN_NIPH)
+                else _ORDER_BY_UPDATEDATE
+            )
+        else:
+            order_json = _compact_json(list(order))
+        query = _SDQ_QUERY_TEMPLATE.format(
+            collection=_compact_json(collection),
+            order=order_json,
+            limit=int(limit),
+            cid=_compact_json(str(cid)),
+        )
+        url = f"{self.base_url}/sdq/sphinxql.cgi"
+        params = {"infmt": "json", "outfmt": "json", "query": query}
+        return url, params
 
-    @retry(
-        reraise=True,
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=0.5, min=0.5, max=4),
-        retry=retry_if_exception_type((requests.RequestException,)),
-    )
     def get_sdq_payload(
         self,
         cid: int,
@@ -59,35 +154,22 @@ class PubChemWebFallbackBaseClient:
         limit: int = 200,
         order: Optional[Sequence[str]] = None,
     ) -> Dict[str, Any]:
-        if order is None:
-            order = (
-                ["date,desc"]
-                if collection in (SDQ_COLLECTION_EU_REGISTER, SDQ_COLLECTION_JAPAN_NIPH)
-                else ["updatedate,desc"]
-            )
-        query_obj = {
-            "select": "*",
-            "collection": collection,
-            "order": list(order),
-            "start": 1,
-            "limit": int(limit),
-            "nullatbottom": 1,
-            "where": {"ands": [{"cid": str(cid)}]},
-            "width": 1000000,
-        }
-        url = f"{self.base_url}/sdq/sphinxql.cgi"
-        params = {
-            "infmt": "json",
-            "outfmt": "json",
-            "query": json.dumps(query_obj, separators=(",", ":")),
-        }
-        with self._session() as s:
-            r = s.get(url, params=params, timeout=self.timeout)
-            try:
-                r.raise_for_status()
-            except requests.HTTPError as e:
-                raise PubChemWebFallbackError(f"HTTP {r.status_code} for {url}: {r.text[:500]}") from e
-            try:
-                return r.json()
-            except json.JSONDecodeError as e:
-                raise PubChemWebFallbackError(f"Invalid JSON response for {url}: {r.text[:500]}") from e
+        url, params = self._sdq_request(cid, collection, limit, order)
+        body = self._get_body(url, params)
+        try:
+            return json.loads(body)
+        except ValueError as e:
+            snippet = body[:500].decode("utf-8", errors="replace")
+            raise PubChemWebFallbackError(f"Invalid JSON response for {url}: {snippet}") from e
+
+    def get_sdq_bytes(
+        self,
+        cid: int,
+        *,
+        collection: str = SDQ_COLLECTION_CLINICALTRIALS,
+        limit: int = 200,
+        order: Optional[Sequence[str]] = None,
+    ) -> bytes:
+        """Raw SDQ response body, for callers that only regex-scan it (no JSON parse)."""
+        url, params = self._sdq_request(cid, collection, limit, order)
+        return self._get_body(url, params)
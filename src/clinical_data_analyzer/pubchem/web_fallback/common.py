@@ -3,11 +3,16 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable, List, Set, Tuple
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Set, Tuple
 import re
 
 
 NCT_RE = re.compile(r"\bNCT\d{8}\b", flags=re.IGNORECASE)
+# Same match over undecoded bytes. Inside raw JSON an ID may follow an escape such as
+# "\n" or "\u00a0", which counts as a word boundary once decoded.
+_NCT_BYTES_PATTERN = rb"(?:\b|(?<=\\[nrtbf])|(?<=\\u[0-9a-fA-F]{4}))NCT\d{8}\b"
+NCT_RE_BYTES = re.compile(_NCT_BYTES_PATTERN, flags=re.IGNORECASE)
 
 SDQ_COLLECTION_CLINICALTRIALS = "clinicaltrials"
 SDQ_COLLECTION_EU_REGISTER = "clinicaltrials_eu"
@@ -24,29 +29,44 @@ class PubChemWebFallbackError(RuntimeError):
     pass
 
 
-def _walk(obj: Any) -> Iterable[Any]:
-    if isinstance(obj, dict):
-        for v in obj.values():
-            yield v
-            yield from _walk(v)
-    elif isinstance(obj, list):
-        for v in obj:
-            yield v
-            yield from _walk(v)
+def _iter_strings(obj: Any) -> Iterator[str]:
+    """Yield every string inside ``obj`` (in no particular order) using an explicit stack."""
+    stack = [obj]
+    pop, push = stack.pop, stack.extend
+    while stack:
+        x = pop()
+        if isinstance(x, str):
+            yield x
+        elif isinstance(x, dict):
+            push(x.values())
+        elif isinstance(x, list):
+            push(x)
+
+
+def extract_nct_ids_from_bytes(raw: bytes) -> List[str]:
+    """NCT IDs in a raw HTML page or SDQ JSON body, without decoding or parsing it."""
+    return sorted({v.decode("ascii").upper() for v in NCT_RE_BYTES.findall(raw or b"")})
 
 
 def extract_nct_ids_from_html(html: str) -> List[str]:
-    ncts: Set[str] = {m.group(0).upper() for m in NCT_RE.finditer(html or "")}
-    return sorted(ncts)
+    return sorted({v.upper() for v in NCT_RE.findall(html or "")})
 
 
 def extract_nct_ids_from_sdq_payload(payload: Dict[str, Any]) -> List[str]:
-    ncts: Set[str] = set()
-    for x in _walk(payload):
-        if isinstance(x, str):
-            for m in NCT_RE.finditer(x):
-                ncts.add(m.group(0).upper())
-    return sorted(ncts)
+    """
+    NCT IDs in the result rows of an SDQ payload.
+
+    Only ``SDQOutputSet[0].rows`` is scanned (statistics and echoed query metadata carry no
+    trial IDs); anything without rows, such as a single row dict, is scanned whole.
+    """
+    # Collect raw matches first; rows repeat IDs, so upper-case each distinct one once.
+    found: Set[str] = set()
+    update, findall = found.update, NCT_RE.findall
+    for x in _iter_strings(extract_sdq_rows(payload) or payload):
+        # No upper()-based prefilter (as in pug_view): the regex rejects non-matching
+        # strings without copying them.
+        update(findall(x))
+    return sorted({v.upper() for v in found})
 
 
 def extract_sdq_rows(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -62,33 +82,68 @@ def extract_sdq_rows(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
     return [r for r in rows if isinstance(r, dict)]
 
 
-def normalize_sdq_trial_row(row: Dict[str, Any], *, collection: str) -> Dict[str, Any]:
+@lru_cache(maxsize=None)
+def _row_normalizer(collection: str) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """``normalize_sdq_trial_row`` specialised to one collection (its branches decided once)."""
+    label = SDQ_COLLECTION_LABELS.get(collection, collection)
     if collection == SDQ_COLLECTION_EU_REGISTER:
-        trial_id = row.get("eudractnumber") or row.get("ctid")
+        id_key, alt_id_key = "eudractnumber", "ctid"
     else:
-        trial_id = row.get("ctid") or row.get("eudractnumber")
-
-    date_val = row.get("date")
-    if date_val is None:
-        date_val = row.get("updatedate")
+        id_key, alt_id_key = "ctid", "eudractnumber"
+
+    # Copying a prebuilt dict and filling it is cheaper than a 9-key literal per row.
+    skeleton: Dict[str, Any] = dict.fromkeys(
+        (
+            "collection",
+            "collection_code",
+            "id",
+            "title",
+            "phase",
+            "status",
+            "date",
+            "id_url",
+            "cids",
+        )
+    )
+    skeleton["collection"] = label
+    skeleton["collection_code"] = collection
+
+    def normalize(row: Dict[str, Any]) -> Dict[str, Any]:
+        get = row.get
+        date_val = get("date")
+        if date_val is None:
+            date_val = get("updatedate")
+        out = skeleton.copy()
+        out["id"] = get(id_key) or get(alt_id_key)
+        out["title"] = get("title")
+        out["phase"] = get("phase")
+        out["status"] = get("status")
+        out["date"] = date_val
+        out["id_url"] = get("id_url") or get("link")
+        out["cids"] = get("cids")
+        return out
+
+    return normalize
+
+
+def get_sdq_payload_for(client, cid: int, *, collection: str, limit: int = 200) -> Dict[str, Any]:
+    # The client already orders each known collection by its own date field.
+    return client.get_sdq_payload(cid, collection=collection, limit=limit)
+
+
+def get_normalized_trials_for(
+    client, cid: int, *, collection: str, limit: int = 200
+) -> List[Dict[str, Any]]:
+    rows = extract_sdq_rows(get_sdq_payload_for(client, cid, collection=collection, limit=limit))
+    return list(map(_row_normalizer(collection), rows))
 
-    link_val = row.get("id_url") or row.get("link")
 
-    return {
-        "collection": SDQ_COLLECTION_LABELS.get(collection, collection),
-        "collection_code": collection,
-        "id": trial_id,
-        "title": row.get("title"),
-        "phase": row.get("phase"),
-        "status": row.get("status"),
-        "date": date_val,
-        "id_url": link_val,
-        "cids": row.get("cids"),
-    }
+def normalize_sdq_trial_row(row: Dict[str, Any], *, collection: str) -> Dict[str, Any]:
+    return _row_normalizer(collection)(row)
 
 
 def normalize_sdq_trial_row_union(row: Dict[str, Any], *, collection: str) -> Dict[str, Any]:
-    out = normalize_sdq_trial_row(row, collection=collection)
+    out = _row_normalizer(collection)(row)
     for k, v in row.items():
         if k not in out:
             out[k] = v
@@ -100,9 +155,9 @@ def align_rows_to_union_schema(rows: List[Dict[str, Any]]) -> Tuple[List[Dict[st
         return [], []
     keys: Set[str] = set()
     for r in rows:
-        keys.update(r.keys())
+        keys.update(r)
     ordered_keys = sorted(keys)
-    aligned: List[Dict[str, Any]] = []
-    for r in rows:
-        aligned.append({k: r.get(k) for k in ordered_keys})
-    return aligned, ordered_keys
+    # Overlay each row on an all-None row in schema order; the merge keeps the template's key
+    # order and only touches the keys the (sparse) row actually has.
+    template = dict.fromkeys(ordered_keys)
+    return [{**template, **r} for r in rows], ordered_keys
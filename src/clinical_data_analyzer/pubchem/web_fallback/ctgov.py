@@ -3,21 +3,12 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from functools import partial
 
-from .common import SDQ_COLLECTION_CLINICALTRIALS, extract_sdq_rows, normalize_sdq_trial_row
+from .common import SDQ_COLLECTION_CLINICALTRIALS, get_normalized_trials_for, get_sdq_payload_for
 
-
-def get_ctgov_sdq_payload(client, cid: int, *, limit: int = 200) -> Dict[str, Any]:
-    return client.get_sdq_payload(
-        cid,
-        collection=SDQ_COLLECTION_CLINICALTRIALS,
-        limit=limit,
-        order=["updatedate,desc"],
-    )
-
-
-def get_ctgov_normalized_trials(client, cid: int, *, limit: int = 200) -> List[Dict[str, Any]]:
-    payload = get_ctgov_sdq_payload(client, cid, limit=limit)
-    rows = extract_sdq_rows(payload)
-    return [normalize_sdq_trial_row(r, collection=SDQ_COLLECTION_CLINICALTRIALS) for r in rows]
+# Kept for callers importing this module directly; the client uses ``common`` instead.
+get_ctgov_sdq_payload = partial(get_sdq_payload_for, collection=SDQ_COLLECTION_CLINICALTRIALS)
+get_ctgov_normalized_trials = partial(
+    get_normalized_trials_for, collection=SDQ_COLLECTION_CLINICALTRIALS
+)
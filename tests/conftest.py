@@ -0,0 +1,240 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2026 Magic AI Research Association
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import subprocess
+from functools import lru_cache
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple, Union
+
+import pytest
+import requests
+
+from clinical_data_analyzer._http import pooled_session
+from clinical_data_analyzer.ctgov import CTGovClient
+from clinical_data_analyzer.pubchem import PubChemClassificationClient, PubChemPugViewClient
+from clinical_data_analyzer.pubchem.client import PubChemClient
+
+Payload = Union[Dict[str, Any], bytes]
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "scripts"
+
+ASPIRIN_CID = 2244
+ASPIRIN_STUDY: Dict[str, Any] = {
+    "protocolSection": {
+        "identificationModule": {"nctId": "NCT00000001", "briefTitle": "Aspirin for headache"},
+        "statusModule": {"overallStatus": "COMPLETED"},
+        "armsInterventionsModule": {"interventions": [{"type": "DRUG", "name": "Aspirin"}]},
+    }
+}
+
+# (URL substring, payload); the first match wins, so list specific routes first.
+PUBCHEM_ROUTES: Tuple[Tuple[str, Payload], ...] = (
+    ("/cids/JSON", {"IdentifierList": {"CID": [ASPIRIN_CID]}}),
+    (
+        "/property/",
+        {
+            "PropertyTable": {
+                "Properties": [
+                    {
+                        "CID": ASPIRIN_CID,
+                        "InChIKey": "BSYNRYMUTXBXSQ-UHFFFAOYSA-N",
+                        "CanonicalSMILES": "CC(=O)OC1=CC=CC=C1C(=O)O",
+                        "IUPACName": "2-acetyloxybenzoic acid",
+                    }
+                ]
+            }
+        },
+    ),
+    (
+        "/synonyms/JSON",
+        {"InformationList": {"Information": [{"CID": ASPIRIN_CID, "Synonym": ["aspirin"]}]}},
+    ),
+    ("/hnid/", f"{ASPIRIN_CID}\n".encode("ascii")),
+)
+CTGOV_ROUTES: Tuple[Tuple[str, Payload], ...] = (
+    ("/studies/NCT", ASPIRIN_STUDY),
+    ("/studies", {"studies": [ASPIRIN_STUDY]}),
+)
+PUG_VIEW_ROUTES: Tuple[Tuple[str, Payload], ...] = (
+    (
+        "/pug_view/data/compound/",
+        {"Record": {"Section": [{"Information": [{"StringValue": "NCT00000001"}]}]}},
+    ),
+)
+
+
+class RoutedResponse:
+    def __init__(self, payload: Payload, status: int = 200):
+        self.status_code = status
+        self.headers: Dict[str, str] = {}
+        if not isinstance(payload, bytes):
+            payload = json.dumps(payload).encode("utf-8")
+        self.content = payload
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+
+class RoutedSession:
+    """Stand-in ``requests.Session`` answering from canned payloads keyed by URL substring."""
+
+    def __init__(self, routes: Sequence[Tuple[str, Payload]]):
+        self.routes = list(routes)
+        self.headers: Dict[str, str] = {}
+        self.calls: List[str] = []
+
+    def get(self, url: str, **kwargs: Any) -> RoutedResponse:
+        self.calls.append(url)
+        for fragment, payload in self.routes:
+            if fragment in url:
+                return RoutedResponse(payload)
+        return RoutedResponse(b"not found", status=404)
+
+    post = get
+
+    def close(self) -> None:
+        pass
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption(
+        "--run-remote",
+        action="store_true",
+        default=False,
+        help="also run tests marked 'network' against the live PubChem/CTGov services",
+    )
+
+
+def pytest_collection_modifyitems(config: pytest.Config, items: List[pytest.Item]) -> None:
+    if config.getoption("--run-remote"):
+        return
+    skip = pytest.mark.skip(reason="live network test; pass --run-remote to run")
+    for item in items:
+        if "network" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def mock_pubchem_session(monkeypatch: pytest.MonkeyPatch) -> RoutedSession:
+    session = RoutedSession(PUBCHEM_ROUTES)
+    monkeypatch.setattr(PubChemClient, "_session", lambda self: session)
+    monkeypatch.setattr(PubChemClassificationClient, "_session", lambda self: session)
+    return session
+
+
+@pytest.fixture
+def mock_ctgov_session(monkeypatch: pytest.MonkeyPatch) -> RoutedSession:
+    session = RoutedSession(CTGOV_ROUTES)
+    monkeypatch.setattr(CTGovClient, "_session", lambda self: session)
+    return session
+
+
+@pytest.fixture
+def mock_pug_view_session(monkeypatch: pytest.MonkeyPatch) -> RoutedSession:
+    session = RoutedSession(PUG_VIEW_ROUTES)
+    monkeypatch.setattr(PubChemPugViewClient, "_session", lambda self: session)
+    return session
+
+
+@pytest.fixture(scope="session")
+def remote_http_session() -> Iterator[requests.Session]:
+    """
+    One keep-alive session for the whole run, so live tests share TCP/TLS connections.
+
+    Successful GETs are kept for the run as well: several live tests ask for the same
+    compound, and each URL only needs to be fetched once.
+    """
+    session = pooled_session(PubChemClient.user_agent, pool_connections=16, pool_maxsize=64)
+    fetched: Dict[str, requests.Response] = {}
+    fetch = session.get
+
+    def get(url: str, params: Any = None, **kwargs: Any) -> requests.Response:
+        key = requests.Request("GET", url, params=params).prepare().url or url
+        r = fetched.get(key)
+        if r is None:
+            r = fetch(url, params=params, **kwargs)
+            if r.ok:
+                fetched[key] = r
+        return r
+
+    session.get = get  # type: ignore[method-assign]
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def shared_remote_session(
+    monkeypatch: pytest.MonkeyPatch, remote_http_session: requests.Session
+) -> requests.Session:
+    for cls in (PubChemClient, PubChemClassificationClient, PubChemPugViewClient, CTGovClient):
+        monkeypatch.setattr(cls, "_session", lambda self: remote_http_session)
+    return remote_http_session
+
+
+@lru_cache(maxsize=None)
+def load_script(name: str) -> ModuleType:
+    """Import ``scripts/<name>.py`` once per session (the scripts directory is not a package)."""
+    spec = importlib.util.spec_from_file_location(f"_scripts_{name}", SCRIPTS_DIR / f"{name}.py")
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _read_jsonl(path: Path) -> List[Dict[str, Any]]:
+    # Decode line by line from the open file instead of building one string and a line list.
+    with path.open("r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _write_jsonl(path: Path, rows: Sequence[Dict[str, Any]]) -> None:
+    # One encoded buffer and a single write, rather than concatenating str lines.
+    path.write_bytes(
+        b"".join(json.dumps(r, ensure_ascii=False).encode("utf-8") + b"\n" for r in rows)
+    )
+
+
+@pytest.fixture
+def read_jsonl() -> Callable[[Path], List[Dict[str, Any]]]:
+    return _read_jsonl
+
+
+@pytest.fixture
+def write_jsonl() -> Callable[[Path, Sequence[Dict[str, Any]]], None]:
+    return _write_jsonl
+
+
+@pytest.fixture
+def script_module() -> Callable[[str], ModuleType]:
+    return load_script
+
+
+@pytest.fixture
+def run_script(
+    capsys: pytest.CaptureFixture[str],
+) -> Callable[..., "subprocess.CompletedProcess[str]"]:
+    """Call a script's ``main(argv)`` in-process; the result mirrors ``subprocess.run``."""
+
+    def run(name: str, args: List[str]) -> "subprocess.CompletedProcess[str]":
+        capsys.readouterr()
+        try:
+            code = load_script(name).main(args)
+        except SystemExit as e:  # argparse errors / --help
+            code = e.code if isinstance(e.code, int) else 1
+        out, err = capsys.readouterr()
+        return subprocess.CompletedProcess([name, *args], code, out, err)
+
+    return run
@@ -1,9 +1,19 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2026 Magic AI Research Association
 
+import pytest
+
 from clinical_data_analyzer.ctgov import CTGovClient
 
-def test_ctgov_search_basic():
+
+def test_ctgov_search_basic(mock_ctgov_session):
+    c = CTGovClient()
+    payload = c.search_studies(term="aspirin", page_size=1)
+    assert "studies" in payload
+
+
+@pytest.mark.network
+def test_ctgov_search_basic_remote(shared_remote_session):
     c = CTGovClient()
     payload = c.search_studies(term="aspirin", page_size=1)
     assert "studies" in payload
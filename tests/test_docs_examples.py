@@ -3,8 +3,10 @@
 
 from __future__ import annotations
 
+from contextlib import nullcontext
 from typing import Any, Dict, List
 import json
+import time
 
 import requests
 import pytest
@@ -16,7 +18,7 @@ from clinical_data_analyzer.ctgov import (
     CTGovSort,
     extract_study_compact,
 )
-from clinical_data_analyzer.pubchem.client import PubChemClient
+from clinical_data_analyzer.pubchem.client import PubChemClient, PubChemError
 from clinical_data_analyzer.pubchem import PubChemClassificationClient
 from clinical_data_analyzer.pubchem import PubChemPugViewClient
 from clinical_data_analyzer.pubchem.web_fallback import (
@@ -29,15 +31,22 @@ from clinical_data_analyzer.pubchem.web_fallback import (
     extract_nct_ids_from_html,
 )
 from clinical_data_analyzer.pipeline.build_dataset import build_dataset_for_cids
-from clinical_data_analyzer.pipeline.cid_to_nct import CidToNctConfig, export_cids_nct_dataset
+from clinical_data_analyzer.pipeline.cid_to_nct import (
+    CidToNctConfig,
+    export_cids_nct_dataset,
+    prefetch_compound_properties,
+)
 
 
 class _DummyResponse:
+    __slots__ = ("_data", "status_code", "headers", "text", "content")
+
     def __init__(self, data: Dict[str, Any], status: int = 200, headers: Dict[str, str] | None = None):
         self._data = data
         self.status_code = status
         self.headers = headers or {}
         self.text = "dummy"
+        self.content = json.dumps(data).encode("utf-8")
 
     def json(self) -> Dict[str, Any]:
         return self._data
@@ -62,6 +71,19 @@ class _DummySession:
         return False
 
 
+def _dummy_session(*payloads: Any) -> _DummySession:
+    """One session answering ``payloads`` in order; a tuple is ``(payload, status[, headers])``."""
+    return _DummySession(
+        [_DummyResponse(*p) if isinstance(p, tuple) else _DummyResponse(p) for p in payloads]
+    )
+
+
+def _session_per_call(*payloads: Any):
+    """``_session`` replacement handing each call a fresh session holding the next payload."""
+    it = iter(payloads)
+    return lambda self: _dummy_session(next(it))
+
+
 def test_ctgov_search_iter_and_compact(monkeypatch):
     payload = {
         "studies": [
@@ -73,10 +95,8 @@ def test_ctgov_search_iter_and_compact(monkeypatch):
             }
         ]
     }
-    responses = [_DummyResponse(payload)]
-
     client = CTGovClient()
-    monkeypatch.setattr(CTGovClient, "_session", lambda self: _DummySession(responses))
+    monkeypatch.setattr(CTGovClient, "_session", lambda self: _dummy_session(payload))
 
     data = client.search_studies(term="aspirin", fields=["NCTId", "BriefTitle"], sort=CTGovSort.asc("NCTId"))
     assert "studies" in data
@@ -88,12 +108,46 @@ def test_ctgov_search_iter_and_compact(monkeypatch):
     assert compact["nct_id"] == "NCT00000001"
 
 
+def test_extract_study_compact_flat_input():
+    compact = extract_study_compact(
+        {
+            "nctId": "NCT00000002",
+            "briefTitle": "Flat",
+            "overallStatus": "RECRUITING",
+            "startDateStruct": {"date": "2020-01"},
+            "conditions": ["Pain", 3],
+            "interventions": [{"name": "Aspirin"}, {"type": "DRUG"}],
+            "leadSponsor": {"name": "Sponsor"},
+        }
+    )
+    assert compact["nct_id"] == "NCT00000002"
+    assert compact["start_date"] == "2020-01"
+    assert compact["completion_date"] is None
+    assert compact["conditions"] == ["Pain"]
+    assert compact["interventions"] == ["Aspirin"]
+    assert compact["lead_sponsor"] == "Sponsor"
+    assert compact["collaborators"] == []
+
+
+def test_ctgov_retry_after_is_waited_once(monkeypatch):
+    client = CTGovClient()
+    monkeypatch.setattr(
+        CTGovClient,
+        "_session",
+        _session_per_call(({}, 429, {"Retry-After": "0"}), {"studies": []}),
+    )
+
+    t0 = time.monotonic()
+    data = client.search_studies(term="aspirin")
+    assert data == {"studies": []}
+    # Retry-After: 0 replaces the exponential backoff (min 0.5s).
+    assert time.monotonic() - t0 < 0.5
+
+
 def test_ctgov_query_validation(monkeypatch):
     payload = {"studies": []}
-    responses = [_DummyResponse(payload)]
-
     client = CTGovClient()
-    monkeypatch.setattr(CTGovClient, "_session", lambda self: _DummySession(responses))
+    monkeypatch.setattr(CTGovClient, "_session", lambda self: _dummy_session(payload))
 
     ok = client.search_studies(query={"titles": "aspirin"}, validate_query_keys=True)
     assert "studies" in ok
@@ -107,9 +161,11 @@ def test_ctgov_query_validation(monkeypatch):
 def test_pubchem_clients(monkeypatch):
     pub = PubChemClient()
 
-    responses = [
-        _DummyResponse({"IdentifierList": {"CID": [2244]}}),
-        _DummyResponse(
+    monkeypatch.setattr(
+        PubChemClient,
+        "_session",
+        _session_per_call(
+            {"IdentifierList": {"CID": [2244]}},
             {
                 "PropertyTable": {
                     "Properties": [
@@ -120,16 +176,9 @@ def test_pubchem_clients(monkeypatch):
                         }
                     ]
                 }
-            }
+            },
+            {"InformationList": {"Information": [{"Synonym": ["Aspirin"]}]}},
         ),
-        _DummyResponse({"InformationList": {"Information": [{"Synonym": ["Aspirin"]}]}}),
-    ]
-
-    response_iter = iter(responses)
-    monkeypatch.setattr(
-        PubChemClient,
-        "_session",
-        lambda self: _DummySession([next(response_iter)]),
     )
 
     cids = pub.cids_by_name("aspirin")
@@ -142,20 +191,22 @@ def test_pubchem_clients(monkeypatch):
     assert "Aspirin" in syns
 
 
-def test_pubchem_classification(monkeypatch):
+def test_pubchem_classification():
     class DummyResponse:
         status_code = 200
         text = "101\n102\n"
+        content = b"101\n102\n"
 
         def json(self):
             return {"IdentifierList": {"CID": [101, 102]}}
 
-    def fake_get(url, headers=None, timeout=None):
-        return DummyResponse()
-
-    monkeypatch.setattr(requests, "get", fake_get)
+    class DummySession:
+        def get(self, url, headers=None, timeout=None):
+            return DummyResponse()
 
     client = PubChemClassificationClient()
+    # Inject into this client only; patching requests.Session.get would affect every session.
+    object.__setattr__(client, "_http", DummySession())
     cids = client.get_cids(123, fmt="TXT")
     assert cids == [101, 102]
 
@@ -174,12 +225,51 @@ def test_pug_view_extracts_nct(monkeypatch):
     }
 
     pv = PubChemPugViewClient()
-    monkeypatch.setattr(PubChemPugViewClient, "_session", lambda self: _DummySession([_DummyResponse(payload)]))
+    monkeypatch.setattr(PubChemPugViewClient, "_session", lambda self: _dummy_session(payload))
 
     ncts = pv.nct_ids_for_cid(2244)
     assert ncts == ["NCT01234567"]
 
 
+def test_pug_view_and_pubchem_cache_per_cid(monkeypatch):
+    payload = {"Record": {"Section": [{"Information": [{"StringValue": "NCT01234567"}]}]}}
+    calls = {"pv": 0, "pub": 0}
+
+    def pv_session(self):
+        calls["pv"] += 1
+        return _dummy_session(payload)
+
+    def pub_session(self):
+        calls["pub"] += 1
+        return _dummy_session({"PropertyTable": {"Properties": [{"IUPACName": "x"}]}})
+
+    monkeypatch.setattr(PubChemPugViewClient, "_session", pv_session)
+    monkeypatch.setattr(PubChemClient, "_session", pub_session)
+
+    pv = PubChemPugViewClient()
+    first = pv.nct_ids_for_cid(2244)
+    first.append("mutated")
+    assert pv.nct_ids_for_cid(2244) == ["NCT01234567"]
+    assert calls["pv"] == 1
+
+    pub = PubChemClient()
+    pub.compound_properties(2244)["IUPACName"] = "mutated"
+    assert pub.compound_properties(2244) == {"IUPACName": "x"}
+    assert calls["pub"] == 1
+
+
+def test_lru_cache_evicts_least_recently_used():
+    from clinical_data_analyzer._cache import LruCache
+
+    cache = LruCache(maxsize=2)
+    cache.put(1, "a")
+    cache.put(2, "b")
+    assert cache.get(1) == "a"  # 2 is now least recently used
+    cache.put(3, "c")
+    assert 2 not in cache
+    assert cache.get(1) == "a" and cache.get(3) == "c"
+
+
 def test_pug_view_heading_lookup_for_external_clinical_trials(monkeypatch):
     base_payload = {
         "Record": {
@@ -241,6 +331,10 @@ def test_pug_view_heading_lookup_for_drug_medication_info(monkeypatch):
 def test_extract_nct_ids_from_html():
     html = "<html><body>CTID: NCT01214278 and NCT00000001</body></html>"
     assert extract_nct_ids_from_html(html) == ["NCT00000001", "NCT01214278"]
+    assert extract_nct_ids_from_html("NCT00000001 xNCT00000002 _NCT00000003 (NCT00000004)") == [
+        "NCT00000001",
+        "NCT00000004",
+    ]
 
 
 def test_extract_nct_ids_from_sdq_payload():
@@ -250,19 +344,22 @@ def test_extract_nct_ids_from_sdq_payload():
                 "rows": [
                     {"ctid": "NCT01214278"},
                     {"ctid": "NCT00000001"},
-                ]
+                ],
+                "query": {"where": "NCT09999999"},
             }
         ]
     }
     assert extract_nct_ids_from_sdq_payload(payload) == ["NCT00000001", "NCT01214278"]
+    assert extract_nct_ids_from_sdq_payload({"ctid": "nct00000002"}) == ["NCT00000002"]
 
 
 def test_web_fallback_uses_sdq_first():
     class DummyWebFallback(PubChemWebFallbackClient):
-        def get_clinicaltrials_sdq_payload(self, cid: int, *, limit: int = 200):
-            return {"rows": [{"ctid": "NCT01214278"}]}
+        def get_sdq_bytes(self, cid: int, *, collection: str, limit: int = 200, order=None):
+            assert collection == "clinicaltrials"
+            return b'{"rows": [{"ctid": "NCT01214278"}]}'
 
-        def get_compound_page_html(self, cid: int):
+        def get_compound_page_bytes(self, cid: int):
             raise AssertionError("html fallback should not be called when sdq has NCT")
 
     ncts, source = DummyWebFallback().nct_ids_for_cid_with_source(38)
@@ -270,6 +367,40 @@ def test_web_fallback_uses_sdq_first():
     assert source.startswith("PubChem web clinicaltrials endpoint fallback")
 
 
+def test_web_fallback_registry_sdq_keeps_priority_order():
+    class DummyWebFallback(PubChemWebFallbackClient):
+        def get_sdq_bytes(self, cid: int, *, collection: str, limit: int = 200, order=None):
+            if collection == "clinicaltrials_eu":
+                time.sleep(0.02)
+                return b'{"rows": [{"ctid": "NCT00000001"}]}' if cid == 1 else b'{"rows": []}'
+            if collection == "clinicaltrials_jp":
+                return b'{"rows": [{"ctid": "NCT00000002"}]}'
+            return b'{"rows": []}'
+
+        def get_compound_page_bytes(self, cid: int):
+            raise AssertionError("html fallback should not be called when sdq has NCT")
+
+    client = DummyWebFallback()
+    ncts, source = client.nct_ids_for_cid_with_source(1)
+    assert ncts == ["NCT00000001"]
+    assert "EU Clinical Trials Register" in source
+    ncts, source = client.nct_ids_for_cid_with_source(2)
+    assert ncts == ["NCT00000002"]
+    assert "Japan" in source
+
+
+def test_extract_nct_ids_from_bytes_matches_text_scan():
+    from clinical_data_analyzer.pubchem.web_fallback.common import extract_nct_ids_from_bytes
+
+    raw = (
+        b'{"a": "see nct01234567.", "b": "x\\nNCT00000002",'
+        b' "c": "XNCT00000003", "d": "NCT000000044"}'
+    )
+    assert extract_nct_ids_from_bytes(raw) == ["NCT00000002", "NCT01234567"]
+    assert extract_nct_ids_from_bytes(raw) == extract_nct_ids_from_sdq_payload(json.loads(raw))
+    assert extract_nct_ids_from_bytes(b'"\\u00a0NCT00000005", "\\xNCT00000006"') == ["NCT00000005"]
+
+
 def test_normalize_sdq_trial_row_ctgov_uses_date_alias():
     row = {
         "ctid": "NCT01561508",
@@ -326,6 +457,20 @@ def test_extract_sdq_rows_and_union_alignment():
     assert aligned[1]["id"] == "2006-006023-39"
 
 
+def test_normalized_trials_union_keeps_collection_order():
+    class _Client(PubChemWebFallbackClient):
+        def get_sdq_payload(self, cid, *, collection="clinicaltrials", limit=200, order=None):
+            time.sleep(0.02 if collection == "clinicaltrials" else 0)
+            return {"SDQOutputSet": [{"rows": [{"ctid": f"{collection}-{cid}"}]}]}
+
+    aligned, _ = _Client().get_normalized_trials_union(5)
+    assert [r["collection_code"] for r in aligned] == [
+        "clinicaltrials",
+        "clinicaltrials_eu",
+        "clinicaltrials_jp",
+    ]
+
+
 def test_pug_view_uses_web_fallback_when_rest_empty(monkeypatch):
     pv = PubChemPugViewClient(use_web_fallback=True)
     monkeypatch.setattr(PubChemPugViewClient, "get_compound_record", lambda self, cid: {"Record": {}})
@@ -344,7 +489,7 @@ def test_pug_view_uses_web_fallback_when_rest_empty(monkeypatch):
     assert source.startswith("PubChem web clinicaltrials endpoint fallback")
 
 
-def test_cid_to_nct_ctgov_fallback(tmp_path):
+def test_cid_to_nct_ctgov_fallback(tmp_path, read_jsonl):
     class DummyPubChem:
         def compound_properties(self, cid: int):
             return {"IUPACName": "aspirin"}
@@ -378,12 +523,12 @@ def test_cid_to_nct_ctgov_fallback(tmp_path):
         ctgov=DummyCTGov(),
     )
 
-    rows = [json.loads(line) for line in outputs["cid_nct_links"].read_text(encoding="utf-8").splitlines() if line]
+    rows = read_jsonl(outputs["cid_nct_links"])
     assert rows[0]["nct_ids"] == ["NCT00000042"]
     assert rows[0]["source"].startswith("CTGov term-link fallback")
 
 
-def test_cid_to_nct_source_from_pug_view_fallback(tmp_path):
+def test_cid_to_nct_source_from_pug_view_fallback(tmp_path, read_jsonl):
     class DummyPubChem:
         def compound_properties(self, cid: int):
             return {"IUPACName": "compound"}
@@ -405,12 +550,12 @@ def test_cid_to_nct_source_from_pug_view_fallback(tmp_path):
         pug_view=DummyPugView(),
     )
 
-    rows = [json.loads(line) for line in outputs["cid_nct_links"].read_text(encoding="utf-8").splitlines() if line]
+    rows = read_jsonl(outputs["cid_nct_links"])
     assert rows[0]["nct_ids"] == ["NCT01214278"]
     assert rows[0]["source"].startswith("PubChem web fallback")
 
 
-def test_cid_to_nct_non_fail_fast_on_errors(tmp_path):
+def test_cid_to_nct_non_fail_fast_on_errors(tmp_path, read_jsonl):
     class DummyPubChem:
         def compound_properties(self, cid: int):
             raise RuntimeError("no pubchem")
@@ -433,12 +578,12 @@ def test_cid_to_nct_non_fail_fast_on_errors(tmp_path):
         pug_view=DummyPugView(),
     )
 
-    link_rows = [json.loads(line) for line in outputs["cid_nct_links"].read_text(encoding="utf-8").splitlines() if line]
+    link_rows = read_jsonl(outputs["cid_nct_links"])
     assert len(link_rows) == 2
     assert link_rows[0]["nct_ids"] == []
     assert "pug_view_error" in link_rows[0].get("error", "")
 
-    comp_rows = [json.loads(line) for line in outputs["compounds"].read_text(encoding="utf-8").splitlines() if line]
+    comp_rows = read_jsonl(outputs["compounds"])
     assert len(comp_rows) == 2
     assert "compound_props_error" in comp_rows[0].get("error", "")
 
@@ -465,7 +610,488 @@ def test_pipeline_build_dataset(monkeypatch, tmp_path):
     pub = DummyPubChem()
     ct = DummyCTGov()
 
+    # The default config writes to ./out; keep it inside this test's directory.
+    monkeypatch.chdir(tmp_path)
     out = build_dataset_for_cids([2244], pub, ct, linker=DummyLinker(pub, ct), config=None)
     assert "compounds" in out
     assert "links" in out
     assert "studies" in out
+
+
+def test_pipeline_build_dataset_keeps_cid_order(tmp_path, read_jsonl):
+    class DummyPubChem:
+        def compound_properties(self, cid: int):
+            return {"InChIKey": f"KEY{cid}"}
+
+        def synonyms(self, cid: int, max_items: int = 30):
+            return []
+
+    class DummyCTGov:
+        def get_study(self, nct_id: str):
+            return {"protocolSection": {"identificationModule": {"nctId": nct_id}}}
+
+    from clinical_data_analyzer.pipeline.build_dataset import DatasetBuildConfig
+    from clinical_data_analyzer.pipeline.linker import CompoundTrialLinker, LinkEvidence, LinkResult
+
+    class DummyLinker(CompoundTrialLinker):
+        def link_cid(self, cid: int):
+            ev = LinkEvidence(term="x", query_mode="term", score=3, reasons=[])
+            return [LinkResult(cid=cid, nct_id=f"NCT{cid:08d}", evidence=ev)]
+
+    pub = DummyPubChem()
+    ct = DummyCTGov()
+    cids = [5, 3, 9, 1]
+    cfg = DatasetBuildConfig(out_dir=str(tmp_path), max_workers=3)
+    out = build_dataset_for_cids(cids, pub, ct, linker=DummyLinker(pub, ct), config=cfg)
+
+    comp_rows = read_jsonl(out["compounds"])
+    link_rows = read_jsonl(out["links"])
+    assert [r["cid"] for r in comp_rows] == cids
+    assert [r["cid"] for r in link_rows] == cids
+
+
+def test_linker_scores_and_dedups_studies_across_terms():
+    from clinical_data_analyzer.pipeline.linker import CompoundTrialLinker
+
+    class DummyPubChem:
+        def compound_properties(self, cid: int):
+            return {}
+
+        def synonyms(self, cid: int, max_items: int = 20):
+            return ["Aspirin", "ASA"]
+
+    class DummyCTGov:
+        def iter_studies(self, intr=None, term=None, page_size=100, max_pages=1):
+            yield {
+                "protocolSection": {
+                    "identificationModule": {
+                        "nctId": "NCT00000042",
+                        "briefTitle": "Low-dose  Aspirin trial",
+                    },
+                    "conditionsModule": {"conditions": ["ASA sensitivity"]},
+                }
+            }
+
+    linker = CompoundTrialLinker(DummyPubChem(), DummyCTGov())
+    results = linker.link_cid(2244)
+    assert [r.nct_id for r in results] == ["NCT00000042"]
+    assert results[0].evidence.term == "Aspirin"
+    assert results[0].evidence.score == 3
+
+    score, reasons = linker._score("aspir", DummyCTGov().iter_studies().__next__())
+    assert score == 2
+    assert reasons == ["term_found_in_core_fields(+2)"]
+
+    assert linker._score("as", DummyCTGov().iter_studies().__next__()) == (0, [])
+    assert linker._score("aspirin", {}) == (0, [])
+
+
+def test_collect_ctgov_docs_fetches_studies_in_order_with_limit(monkeypatch, tmp_path, read_jsonl):
+    from clinical_data_analyzer.pipeline import collect_ctgov_docs_service as svc
+
+    def fake_fetch(hnids, out_dir, limit):
+        out_dir.mkdir(parents=True, exist_ok=True)
+        return {"cids_txt": out_dir / "cids.txt", "cids_jsonl": out_dir / "cids.jsonl"}, [1, 2]
+
+    links = {1: ["NCT00000003", "NCT00000001", "NCT00000003"], 2: ["NCT00000001", "NCT00000002"]}
+
+    def fake_map(cid, **kwargs):
+        if cid == 2:
+            # CID 1's map rows are on disk before CID 2 starts, even with progress off.
+            assert "1,NCT00000001" in (tmp_path / "cid_nct_map.csv").read_text(encoding="utf-8")
+        return {"link": {"cid": cid, "nct_ids": links[cid]}}
+
+    closed = []
+
+    class FakeCTGov:
+        def get_study(self, nct, fields=None):
+            time.sleep(0.01 if nct.endswith("3") else 0)
+            return {"protocolSection": {"identificationModule": {"nctId": nct}}}
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            closed.append("ctgov")
+
+    monkeypatch.setattr(svc, "_fetch_cids_by_hnids", fake_fetch)
+    monkeypatch.setattr(svc, "map_cid_to_nct_record", fake_map)
+    monkeypatch.setattr(svc, "CTGovClient", FakeCTGov)
+    monkeypatch.setattr(svc, "PubChemClient", nullcontext)
+    monkeypatch.setattr(svc, "PubChemPugViewClient", nullcontext)
+
+    res = svc.collect_ctgov_docs(
+        svc.CollectCtgovDocsConfig(hnids=[1], out_dir=str(tmp_path), limit_ncts=2, max_workers=4)
+    )
+
+    rows = read_jsonl(tmp_path / "studies.jsonl")
+    got = [(r["cid"], r["protocolSection"]["identificationModule"]["nctId"]) for r in rows]
+    # The NCT limit stops CID 2 before NCT00000002, but cached studies are still emitted.
+    assert got == [(1, "NCT00000003"), (1, "NCT00000001"), (1, "NCT00000003"), (2, "NCT00000001")]
+    assert res.nct_requested == 2
+    assert res.nct_fetched == 2
+    assert closed == ["ctgov"]
+
+
+def test_http_cache_memoizes_across_instances(tmp_path):
+    from clinical_data_analyzer._cache import CachedClient, HttpCache
+
+    class Client:
+        calls = 0
+        label = "pv"
+
+        def nct_ids_for_cid_with_source(self, cid):
+            Client.calls += 1
+            return [f"NCT{cid:08d}"], "src"
+
+    path = tmp_path / ".cache" / "cache.db"
+    with HttpCache(path) as cache:
+        proxy = CachedClient(Client(), cache, ("nct_ids_for_cid_with_source",))
+        assert proxy.nct_ids_for_cid_with_source(7) == (["NCT00000007"], "src")
+        assert proxy.label == "pv"
+
+    with HttpCache(path) as cache:
+        proxy = CachedClient(Client(), cache, ("nct_ids_for_cid_with_source",))
+        ncts, source = proxy.nct_ids_for_cid_with_source(7)
+        assert (ncts, source) == (["NCT00000007"], "src")
+        assert Client.calls == 1
+
+    with HttpCache(path, ttl_sec=-1) as cache:
+        proxy = CachedClient(Client(), cache, ("nct_ids_for_cid_with_source",))
+        proxy.nct_ids_for_cid_with_source(7)
+        assert Client.calls == 2
+
+
+def test_synonyms_batch_feeds_fallback_linker(monkeypatch, tmp_path, read_jsonl):
+    payload = {
+        "InformationList": {
+            "Information": [
+                {"CID": 2244, "Synonym": ["Aspirin", " Aspirin ", "ASA"]},
+                {"CID": 3672},
+            ]
+        }
+    }
+    posted = []
+
+    def fake_post(self, url, data):
+        posted.append(data["cid"])
+        return payload
+
+    monkeypatch.setattr(PubChemClient, "_post_json", fake_post)
+    monkeypatch.setattr(
+        PubChemClient, "synonyms", lambda self, cid, max_items=50: pytest.fail("per-CID call")
+    )
+    monkeypatch.setattr(PubChemClient, "compound_properties", lambda self, cid: {})
+
+    pub = PubChemClient()
+    assert pub.synonyms_batch([2244, 3672], max_items=5) == {2244: ["Aspirin", "ASA"], 3672: []}
+
+    class DummyPugView:
+        def nct_ids_for_cid(self, cid: int):
+            return []
+
+    class DummyCTGov:
+        def iter_studies(self, intr=None, term=None, page_size=100, max_pages=1):
+            ident = {"nctId": "NCT00000042", "briefTitle": "Aspirin"}
+            yield {"protocolSection": {"identificationModule": ident}}
+
+    cfg = CidToNctConfig(
+        out_dir=str(tmp_path), include_compound_props=False, use_ctgov_fallback=True
+    )
+    outputs = export_cids_nct_dataset(
+        [2244, 3672], config=cfg, pubchem=pub, pug_view=DummyPugView(), ctgov=DummyCTGov()
+    )
+
+    rows = read_jsonl(outputs["cid_nct_links"])
+    assert [r["nct_ids"] for r in rows] == [["NCT00000042"], []]
+    assert posted[-1] == "2244,3672"
+
+
+def test_prefetch_synonyms_reads_and_fills_http_cache(monkeypatch, tmp_path):
+    from clinical_data_analyzer._cache import CachedClient, HttpCache
+    from clinical_data_analyzer.pipeline.cid_to_nct import prefetch_synonyms
+
+    posted = []
+
+    def fake_post(self, url, data):
+        posted.append(data["cid"])
+        return {"InformationList": {"Information": [{"CID": 2244, "Synonym": ["Aspirin"]}]}}
+
+    monkeypatch.setattr(PubChemClient, "_post_json", fake_post)
+    monkeypatch.setattr(
+        PubChemClient, "synonyms", lambda self, cid, max_items=50: pytest.fail("per-CID call")
+    )
+    path = tmp_path / "cache.db"
+
+    with HttpCache(path) as cache:
+        pub = CachedClient(PubChemClient(), cache, ("synonyms",))
+        assert prefetch_synonyms(pub, [2244, 3672], max_items=5) == {2244: ["Aspirin"], 3672: []}
+    assert posted == ["2244,3672"]
+
+    # 2244 is stored under the key the linker's synonyms(cid, max_items=...) call uses;
+    # 3672 was absent from the response, so it is not cached and is asked for again.
+    with HttpCache(path) as cache:
+        pub = CachedClient(PubChemClient(), cache, ("synonyms",))
+        assert pub.synonyms(2244, max_items=5) == ["Aspirin"]
+        assert prefetch_synonyms(pub, [2244, 3672], max_items=5) == {2244: ["Aspirin"], 3672: []}
+        assert prefetch_synonyms(pub, [2244], max_items=5) == {2244: ["Aspirin"]}
+    assert posted == ["2244,3672", "3672"]
+
+
+def test_compound_properties_bulk_warms_cache(monkeypatch):
+    posted = []
+
+    def fake_post(self, url, data):
+        posted.append(data["cid"])
+        return {
+            "PropertyTable": {
+                "Properties": [
+                    {"CID": 1, "ConnectivitySMILES": "C", "InChIKey": "K1"},
+                    {"CID": 2, "CanonicalSMILES": "CC", "InChIKey": "K2"},
+                ]
+            }
+        }
+
+    monkeypatch.setattr(PubChemClient, "_post_json", fake_post)
+    monkeypatch.setattr(
+        PubChemClient, "_get_json", lambda self, url, params=None: pytest.fail("per-CID call")
+    )
+
+    pub = PubChemClient()
+    out = pub.compound_properties_bulk([1, 2, 3], chunk=2)
+    assert posted == ["1,2", "3"]
+    assert out[1]["CanonicalSMILES"] == "C"
+    assert pub.compound_properties(2)["InChIKey"] == "K2"
+
+
+def test_prefetch_compound_properties_skips_only_failed_batch(monkeypatch):
+    posted = []
+
+    def fake_post(self, url, data):
+        posted.append(data["cid"])
+        if data["cid"] == "1,2":
+            raise PubChemError("HTTP 503")
+        return {"PropertyTable": {"Properties": [{"CID": 3, "InChIKey": "K3"}]}}
+
+    monkeypatch.setattr(PubChemClient, "_post_json", fake_post)
+
+    pub = PubChemClient()
+    prefetch_compound_properties(pub, [1, 2, 3], batch_size=2)
+    assert posted == ["1,2", "3"]
+    assert pub._props_cache.get(3)["InChIKey"] == "K3"
+    assert 1 not in pub._props_cache
+
+
+def test_prefetch_compound_properties_skips_cids_in_http_cache(monkeypatch, tmp_path):
+    from clinical_data_analyzer._cache import CachedClient, HttpCache
+
+    posted = []
+
+    def fake_post(self, url, data):
+        posted.append(data["cid"])
+        rows = [{"CID": int(c), "InChIKey": f"K{c}"} for c in data["cid"].split(",")]
+        return {"PropertyTable": {"Properties": rows}}
+
+    monkeypatch.setattr(PubChemClient, "_post_json", fake_post)
+    monkeypatch.setattr(
+        PubChemClient, "_get_json", lambda self, url, params=None: pytest.fail("per-CID call")
+    )
+    path = tmp_path / "cache.db"
+
+    with HttpCache(path) as cache:
+        pub = CachedClient(PubChemClient(), cache, ("compound_properties",))
+        prefetch_compound_properties(pub, [1, 2])
+        assert pub.compound_properties(1)["InChIKey"] == "K1"
+        assert pub.compound_properties(2)["InChIKey"] == "K2"
+    assert posted == ["1,2"]
+
+    # The on-disk cache answers for 1 and 2, so only 3 is posted.
+    with HttpCache(path) as cache:
+        pub = CachedClient(PubChemClient(), cache, ("compound_properties",))
+        prefetch_compound_properties(pub, [1, 2, 3])
+        assert [pub.compound_properties(c)["InChIKey"] for c in (1, 2, 3)] == ["K1", "K2", "K3"]
+    assert posted == ["1,2", "3"]
+
+    # Fully warm: no POST at all.
+
+    with HttpCache(path) as cache:
+        pub = CachedClient(PubChemClient(), cache, ("compound_properties",))
+        prefetch_compound_properties(pub, [1, 2, 3])
+    assert posted == ["1,2", "3"]
+
+
+def test_download_clinical_trials_cids_keeps_node_order(monkeypatch, tmp_path):
+    from clinical_data_analyzer.pubchem.clinical_trials_nodes import download_clinical_trials_cids
+
+    def fake_get_cids(self, hnid, fmt="TXT"):
+        if hnid == 1856916:
+            time.sleep(0.05)
+        return [hnid % 1000]
+
+    monkeypatch.setattr(PubChemClassificationClient, "get_cids", fake_get_cids)
+
+    out = download_clinical_trials_cids(out_dir=tmp_path)
+    assert list(out) == ["clinical_trials", "clinicaltrials_gov", "eu_register", "japan_niph"]
+    assert out["clinical_trials"] == [916]
+    assert (tmp_path / "japan_niph_cids.txt").read_text(encoding="utf-8") == "575\n"
+
+
+def test_pug_view_record_cache_skips_network_on_warm_run(monkeypatch, tmp_path):
+    from clinical_data_analyzer._cache import REFRESH_ENV, HttpCache
+
+    fetched = []
+
+    def fake_get_json(self, url, timeout):
+        fetched.append(url)
+        return {"Record": {"Section": [{"String": "NCT01234567"}]}}
+
+    monkeypatch.setattr(PubChemPugViewClient, "_get_json", fake_get_json)
+    path = tmp_path / "cache.db"
+
+    with HttpCache(path) as cache:
+        PubChemPugViewClient(record_cache=cache).get_compound_record(2244)
+    with HttpCache(path) as cache:
+        client = PubChemPugViewClient(record_cache=cache, use_web_fallback=False)
+        assert client.nct_ids_for_cid(2244) == ["NCT01234567"]
+    assert len(fetched) == 1
+
+    monkeypatch.setenv(REFRESH_ENV, "0")
+    with HttpCache(path) as cache:
+        PubChemPugViewClient(record_cache=cache).get_compound_record(2244)
+    assert len(fetched) == 1
+
+    monkeypatch.setenv(REFRESH_ENV, "1")
+    with HttpCache(path) as cache:
+        PubChemPugViewClient(record_cache=cache).get_compound_record(2244)
+    assert len(fetched) == 2
+
+
+def test_pug_view_heading_lookup_stops_at_first_hit(monkeypatch):
+    from clinical_data_analyzer.pubchem.pug_view import PubChemPugViewError
+
+    base_payload = {"Record": {"Section": [{"TOCHeading": "Clinical Trial Notes"}]}}
+    asked = []
+
+    def _by_heading(self, cid, heading):
+        asked.append(heading)
+        if heading == "Drug and Medication Information":
+            return {"Record": {"Section": [{"Information": [{"StringValue": "NCT01214278"}]}]}}
+        raise PubChemPugViewError("404")
+
+    monkeypatch.setattr(PubChemPugViewClient, "get_compound_record", lambda self, cid: base_payload)
+    monkeypatch.setattr(PubChemPugViewClient, "get_compound_record_by_heading", _by_heading)
+
+    assert PubChemPugViewClient().nct_ids_for_cid(1) == ["NCT01214278"]
+    assert asked == ["ClinicalTrials.gov", "Drug and Medication Information"]
+
+    asked.clear()
+    pv = PubChemPugViewClient(max_heading_lookups=1, use_web_fallback=False)
+    assert pv.nct_ids_for_cid(1) == []
+    assert asked == ["ClinicalTrials.gov"]
+
+
+def test_pubchem_retries_with_growing_timeouts():
+    from clinical_data_analyzer._http import attempt_timeout
+
+    assert [attempt_timeout(40.0, n) for n in range(1, 6)] == [20.0, 40.0, 40.0, 40.0, 40.0]
+
+    timeouts = []
+
+    class _StallingSession(_DummySession):
+        def get(self, url, params=None, timeout=None):
+            timeouts.append(timeout)
+            if len(timeouts) == 1:
+                raise requests.Timeout("stalled")
+            return super().get(url, params=params, timeout=timeout)
+
+    client = PubChemClient(timeout=40.0)
+    stalling = _StallingSession([_DummyResponse({"IdentifierList": {"CID": [7]}})])
+    object.__setattr__(client, "_http", stalling)
+    assert client.cids_by_name("x") == [7]
+    assert timeouts == [20.0, 40.0]
+
+
+def test_pug_view_reuses_one_web_fallback_client(monkeypatch):
+    from clinical_data_analyzer.pubchem import pug_view as pv_mod
+
+    built = []
+
+    class _Fallback:
+        closed = False
+
+        def __init__(self, **kwargs):
+            built.append(self)
+
+        def nct_ids_for_cid_with_source(self, cid):
+            return [f"NCT{cid:08d}"], "web"
+
+        def close(self):
+            self.closed = True
+
+    monkeypatch.setattr(pv_mod, "PubChemWebFallbackClient", _Fallback)
+    monkeypatch.setattr(
+        PubChemPugViewClient, "get_compound_record", lambda self, cid: {"Record": {}}
+    )
+    monkeypatch.setattr(
+        PubChemPugViewClient, "get_compound_record_by_heading", lambda self, cid, heading: {}
+    )
+
+    with PubChemPugViewClient() as pv:
+        assert pv.nct_ids_for_cid(1) == ["NCT00000001"]
+        assert pv.nct_ids_for_cid(2) == ["NCT00000002"]
+    assert len(built) == 1
+    assert built[0].closed
+
+
+def test_web_fallback_shares_sdq_body_between_payload_and_bytes():
+    payload = {"SDQOutputSet": [{"rows": [{"ctid": "NCT00000009"}]}]}
+    client = PubChemWebFallbackClient()
+    object.__setattr__(client, "_http", _dummy_session(payload, payload))
+
+    assert client.get_sdq_payload(9) == payload
+    assert client.sdq_nct_ids(9, "clinicaltrials") == ["NCT00000009"]
+    assert len(client._http._responses) == 1  # second call served from memory
+
+    client.clear_cache()
+    assert client.get_sdq_payload(9) == payload
+    assert client._http._responses == []
+
+
+def test_web_fallback_body_cache_is_bounded_by_bytes():
+    client = PubChemWebFallbackClient(body_cache_bytes=20)
+    # JSON strings, so bodies are n + 2 bytes long: 8, 8, 8 and 30.
+    object.__setattr__(client, "_http", _dummy_session(*("x" * n for n in (6, 6, 6, 28))))
+
+    for cid in (1, 2, 3, 4):
+        client.get_compound_page_bytes(cid)
+    # 4 did not fit at all; 1 was evicted to make room for 3.
+    assert [k[0].rsplit("/", 1)[1] for k in client._bodies] == ["2", "3"]
+    assert client._bodies_nbytes == 16
+
+
+def test_normalized_trials_and_union_share_one_request_per_collection():
+    payload = {"SDQOutputSet": [{"rows": [{"ctid": "NCT00000009", "date": "2020-01-01"}]}]}
+    client = PubChemWebFallbackClient()
+    object.__setattr__(client, "_http", _dummy_session(payload, payload, payload))
+
+    for collection in ("clinicaltrials", "clinicaltrials_eu", "clinicaltrials_jp"):
+        assert len(client.get_normalized_trials(9, collection=collection)) == 1
+    aligned, _ = client.get_normalized_trials_union(9)
+    assert len(aligned) == 3
+    assert client._http._responses == []
+
+
+def test_web_fallback_retries_transient_status(monkeypatch):
+    from clinical_data_analyzer.pubchem.web_fallback import PubChemWebFallbackError
+    from clinical_data_analyzer.pubchem.web_fallback.base import PubChemWebFallbackBaseClient
+
+    monkeypatch.setattr(PubChemWebFallbackBaseClient._get_with_retry.retry, "sleep", lambda s: None)
+    client = PubChemWebFallbackClient(body_cache_bytes=0)
+    object.__setattr__(
+        client, "_http", _dummy_session(({}, 503), {"ok": 1})
+    )
+    assert client.get_sdq_payload(1) == {"ok": 1}
+
+    object.__setattr__(client, "_http", _dummy_session(({}, 503), ({}, 503), ({}, 503)))
+    with pytest.raises(PubChemWebFallbackError):
+        client.get_sdq_payload(1)
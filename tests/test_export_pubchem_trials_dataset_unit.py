@@ -2,55 +2,73 @@ from __future__ import annotations
 
 import csv
 import json
-import subprocess
-import sys
 from pathlib import Path
 
+import pytest
 
-def test_export_pubchem_trials_dataset_unit(tmp_path: Path):
-    stub_dir = tmp_path / "stubs"
-    stub_dir.mkdir()
-
-    pkg = stub_dir / "clinical_data_analyzer"
-    pkg.mkdir()
-    (pkg / "__init__.py").write_text("", encoding="utf-8")
-
-    pubchem_pkg = pkg / "pubchem"
-    pubchem_pkg.mkdir()
-    (pubchem_pkg / "__init__.py").write_text(
-        "class PubChemClassificationClient:\n"
-        "    def get_cids(self, hnid, fmt='TXT'):\n"
-        "        return [119]\n\n"
-        "class PubChemClient:\n"
-        "    def compound_properties(self, cid):\n"
-        "        return {'CanonicalSMILES':'C1=CC=CC=C1','InChIKey':'KEY','IUPACName':'benzene'}\n\n"
-        "class PubChemWebFallbackClient:\n"
-        "    def get_normalized_trials_union(self, cid, collections=('clinicaltrials',), limit_per_collection=200):\n"
-        "        rows=[\n"
-        "          {'collection':'clinicaltrials','id':'NCT00000001','title':'Trial A','phase':'Phase 2','status':'Completed','date':'2020-01-01','id_url':'https://clinicaltrials.gov/study/NCT00000001'},\n"
-        "          {'collection':'clinicaltrials_eu','id':'2006-006023-39','title':'Trial EU','phase':'Phase 2','status':'Completed','date':'2007-09-24','id_url':'https://www.clinicaltrialsregister.eu/ctr-search/search?query=2006-006023-39','eudractnumber':'2006-006023-39'},\n"
-        "        ]\n"
-        "        keys=sorted({k for r in rows for k in r.keys()})\n"
-        "        return rows, keys\n",
-        encoding="utf-8",
-    )
 
+def _union(rows):
+    return rows, sorted({k for r in rows for k in r.keys()})
+
+
+@pytest.fixture
+def export(monkeypatch, run_script, script_module):
+    """Run the export script in-process with the three PubChem clients replaced by stubs."""
+    module = script_module("export_pubchem_trials_dataset")
+
+    def run(args, *, cids, properties, trials):
+        class PubChemClassificationClient:
+            def get_cids(self, hnid, fmt="TXT"):
+                if cids is None:
+                    raise AssertionError("get_cids should not run when --cids-file is provided")
+                return list(cids)
+
+        class PubChemClient:
+            def compound_properties(self, cid):
+                return dict(properties)
+
+        class PubChemWebFallbackClient:
+            def get_normalized_trials_union(
+                self, cid, collections=("clinicaltrials",), limit_per_collection=200
+            ):
+                return _union(trials(cid))
+
+        monkeypatch.setattr(module, "PubChemClassificationClient", PubChemClassificationClient)
+        monkeypatch.setattr(module, "PubChemClient", PubChemClient)
+        monkeypatch.setattr(module, "PubChemWebFallbackClient", PubChemWebFallbackClient)
+        return run_script("export_pubchem_trials_dataset", args)
+
+    return run
+
+
+def test_export_pubchem_trials_dataset_unit(tmp_path: Path, export, read_jsonl):
     out_dir = tmp_path / "out"
-    env = {"PYTHONPATH": str(stub_dir)}
 
-    result = subprocess.run(
-        [
-            sys.executable,
-            "scripts/export_pubchem_trials_dataset.py",
-            "--hnid",
-            "3647573",
-            "--out-dir",
-            str(out_dir),
-            "--skip-images",
+    result = export(
+        ["--hnid", "3647573", "--out-dir", str(out_dir), "--skip-images"],
+        cids=[119],
+        properties={"CanonicalSMILES": "C1=CC=CC=C1", "InChIKey": "KEY", "IUPACName": "benzene"},
+        trials=lambda cid: [
+            {
+                "collection": "clinicaltrials",
+                "id": "NCT00000001",
+                "title": "Trial A",
+                "phase": "Phase 2",
+                "status": "Completed",
+                "date": "2020-01-01",
+                "id_url": "https://clinicaltrials.gov/study/NCT00000001",
+            },
+            {
+                "collection": "clinicaltrials_eu",
+                "id": "2006-006023-39",
+                "title": "Trial EU",
+                "phase": "Phase 2",
+                "status": "Completed",
+                "date": "2007-09-24",
+                "id_url": "https://www.clinicaltrialsregister.eu/ctr-search/search?query=2006-006023-39",
+                "eudractnumber": "2006-006023-39",
+            },
         ],
-        capture_output=True,
-        text=True,
-        env=env,
     )
 
     assert result.returncode == 0, result.stderr
@@ -69,7 +87,7 @@ def test_export_pubchem_trials_dataset_unit(tmp_path: Path):
     assert trials_compact_json_path.exists()
     assert summary_path.exists()
 
-    rows = [json.loads(x) for x in jsonl_path.read_text(encoding="utf-8").splitlines() if x.strip()]
+    rows = read_jsonl(jsonl_path)
     assert len(rows) == 2
     assert rows[0]["cid"] == 119
     assert rows[0]["smiles"] == "C1=CC=CC=C1"
@@ -96,37 +114,11 @@ def test_export_pubchem_trials_dataset_unit(tmp_path: Path):
     assert summary["n_compounds"] == 1
 
 
-def test_export_pubchem_trials_dataset_shard_options_unit(tmp_path: Path):
-    stub_dir = tmp_path / "stubs"
-    stub_dir.mkdir()
-
-    pkg = stub_dir / "clinical_data_analyzer"
-    pkg.mkdir()
-    (pkg / "__init__.py").write_text("", encoding="utf-8")
-
-    pubchem_pkg = pkg / "pubchem"
-    pubchem_pkg.mkdir()
-    (pubchem_pkg / "__init__.py").write_text(
-        "class PubChemClassificationClient:\n"
-        "    def get_cids(self, hnid, fmt='TXT'):\n"
-        "        return [11, 12, 13, 14]\n\n"
-        "class PubChemClient:\n"
-        "    def compound_properties(self, cid):\n"
-        "        return {'CanonicalSMILES':'C','InChIKey':'K','IUPACName':'x'}\n\n"
-        "class PubChemWebFallbackClient:\n"
-        "    def get_normalized_trials_union(self, cid, collections=('clinicaltrials',), limit_per_collection=200):\n"
-        "        rows=[{'collection':'clinicaltrials','id':f'NCT{cid}','title':'T','phase':'P2','status':'Completed','date':'2020-01-01','id_url':'u'}]\n"
-        "        return rows, sorted(rows[0].keys())\n",
-        encoding="utf-8",
-    )
-
+def test_export_pubchem_trials_dataset_shard_options_unit(tmp_path: Path, export):
     out_dir = tmp_path / "out"
-    env = {"PYTHONPATH": str(stub_dir)}
 
-    result = subprocess.run(
+    result = export(
         [
-            sys.executable,
-            "scripts/export_pubchem_trials_dataset.py",
             "--hnid",
             "3647573",
             "--out-dir",
@@ -137,9 +129,19 @@ def test_export_pubchem_trials_dataset_shard_options_unit(tmp_path: Path):
             "--cid-count",
             "2",
         ],
-        capture_output=True,
-        text=True,
-        env=env,
+        cids=[11, 12, 13, 14],
+        properties={"CanonicalSMILES": "C", "InChIKey": "K", "IUPACName": "x"},
+        trials=lambda cid: [
+            {
+                "collection": "clinicaltrials",
+                "id": f"NCT{cid}",
+                "title": "T",
+                "phase": "P2",
+                "status": "Completed",
+                "date": "2020-01-01",
+                "id_url": "u",
+            }
+        ],
     )
     assert result.returncode == 0, result.stderr
 
@@ -153,40 +155,14 @@ def test_export_pubchem_trials_dataset_shard_options_unit(tmp_path: Path):
     assert summary["cid_count"] == 2
 
 
-def test_export_pubchem_trials_dataset_uses_cids_file_unit(tmp_path: Path):
-    stub_dir = tmp_path / "stubs"
-    stub_dir.mkdir()
-
-    pkg = stub_dir / "clinical_data_analyzer"
-    pkg.mkdir()
-    (pkg / "__init__.py").write_text("", encoding="utf-8")
-
-    pubchem_pkg = pkg / "pubchem"
-    pubchem_pkg.mkdir()
-    (pubchem_pkg / "__init__.py").write_text(
-        "class PubChemClassificationClient:\n"
-        "    def get_cids(self, hnid, fmt='TXT'):\n"
-        "        raise AssertionError('get_cids should not be called when --cids-file is provided')\n\n"
-        "class PubChemClient:\n"
-        "    def compound_properties(self, cid):\n"
-        "        return {'CanonicalSMILES':'C','InChIKey':'K','IUPACName':'x'}\n\n"
-        "class PubChemWebFallbackClient:\n"
-        "    def get_normalized_trials_union(self, cid, collections=('clinicaltrials',), limit_per_collection=200):\n"
-        "        rows=[{'collection':'clinicaltrials','collection_code':'clinicaltrials','id':f'NCT{cid}','title':'T','phase':'P2','status':'Completed','date':'2020-01-01','id_url':'u'}]\n"
-        "        return rows, sorted(rows[0].keys())\n",
-        encoding="utf-8",
-    )
-
+def test_export_pubchem_trials_dataset_uses_cids_file_unit(tmp_path: Path, export):
     cids_file = tmp_path / "cids.txt"
     cids_file.write_text("101\n102\n", encoding="utf-8")
 
     out_dir = tmp_path / "out"
-    env = {"PYTHONPATH": str(stub_dir)}
 
-    result = subprocess.run(
+    result = export(
         [
-            sys.executable,
-            "scripts/export_pubchem_trials_dataset.py",
             "--hnid",
             "3647573",
             "--out-dir",
@@ -195,9 +171,20 @@ def test_export_pubchem_trials_dataset_uses_cids_file_unit(tmp_path: Path):
             "--cids-file",
             str(cids_file),
         ],
-        capture_output=True,
-        text=True,
-        env=env,
+        cids=None,
+        properties={"CanonicalSMILES": "C", "InChIKey": "K", "IUPACName": "x"},
+        trials=lambda cid: [
+            {
+                "collection": "clinicaltrials",
+                "collection_code": "clinicaltrials",
+                "id": f"NCT{cid}",
+                "title": "T",
+                "phase": "P2",
+                "status": "Completed",
+                "date": "2020-01-01",
+                "id_url": "u",
+            }
+        ],
     )
     assert result.returncode == 0, result.stderr
 
@@ -210,32 +197,7 @@ def test_export_pubchem_trials_dataset_uses_cids_file_unit(tmp_path: Path):
     assert summary["n_rows"] == 2
 
 
-def test_export_pubchem_trials_dataset_incremental_skip_unit(tmp_path: Path):
-    stub_dir = tmp_path / "stubs"
-    stub_dir.mkdir()
-
-    pkg = stub_dir / "clinical_data_analyzer"
-    pkg.mkdir()
-    (pkg / "__init__.py").write_text("", encoding="utf-8")
-
-    pubchem_pkg = pkg / "pubchem"
-    pubchem_pkg.mkdir()
-    (pubchem_pkg / "__init__.py").write_text(
-        "class PubChemClassificationClient:\n"
-        "    def get_cids(self, hnid, fmt='TXT'):\n"
-        "        return [119]\n\n"
-        "class PubChemClient:\n"
-        "    def compound_properties(self, cid):\n"
-        "        return {'CanonicalSMILES':'C1=CC=CC=C1','InChIKey':'KEY','IUPACName':'benzene'}\n\n"
-        "class PubChemWebFallbackClient:\n"
-        "    def get_normalized_trials_union(self, cid, collections=('clinicaltrials',), limit_per_collection=200):\n"
-        "        rows=[\n"
-        "          {'collection':'clinicaltrials','collection_code':'clinicaltrials','id':'NCT00000001','title':'Trial A','phase':'Phase 2','status':'Completed','date':'2020-01-01','id_url':'https://clinicaltrials.gov/study/NCT00000001'}\n"
-        "        ]\n"
-        "        return rows, sorted(rows[0].keys())\n",
-        encoding="utf-8",
-    )
-
+def test_export_pubchem_trials_dataset_incremental_skip_unit(tmp_path: Path, export):
     base_rows = [
         {
             "collection": "clinicaltrials",
@@ -256,12 +218,9 @@ def test_export_pubchem_trials_dataset_incremental_skip_unit(tmp_path: Path):
     base_json.write_text(json.dumps(base_rows, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
 
     out_dir = tmp_path / "out"
-    env = {"PYTHONPATH": str(stub_dir)}
 
-    result = subprocess.run(
+    result = export(
         [
-            sys.executable,
-            "scripts/export_pubchem_trials_dataset.py",
             "--hnid",
             "3647573",
             "--out-dir",
@@ -270,9 +229,20 @@ def test_export_pubchem_trials_dataset_incremental_skip_unit(tmp_path: Path):
             "--incremental-from",
             str(base_json),
         ],
-        capture_output=True,
-        text=True,
-        env=env,
+        cids=[119],
+        properties={"CanonicalSMILES": "C1=CC=CC=C1", "InChIKey": "KEY", "IUPACName": "benzene"},
+        trials=lambda cid: [
+            {
+                "collection": "clinicaltrials",
+                "collection_code": "clinicaltrials",
+                "id": "NCT00000001",
+                "title": "Trial A",
+                "phase": "Phase 2",
+                "status": "Completed",
+                "date": "2020-01-01",
+                "id_url": "https://clinicaltrials.gov/study/NCT00000001",
+            }
+        ],
     )
     assert result.returncode == 0, result.stderr
 
@@ -1,12 +1,10 @@
 from __future__ import annotations
 
 import json
-import subprocess
-import sys
 from pathlib import Path
 
 
-def test_merge_pubchem_trials_shards_unit(tmp_path: Path):
+def test_merge_pubchem_trials_shards_unit(tmp_path: Path, run_script, read_jsonl, write_jsonl):
     shard1 = tmp_path / "shard1"
     shard2 = tmp_path / "shard2"
     shard1.mkdir()
@@ -27,32 +25,23 @@ def test_merge_pubchem_trials_shards_unit(tmp_path: Path):
         "date": "2020-01-02",
     }
 
-    (shard1 / "trials.jsonl").write_text(
-        json.dumps(row_a, ensure_ascii=False) + "\n" + json.dumps(row_b, ensure_ascii=False) + "\n",
-        encoding="utf-8",
-    )
+    write_jsonl(shard1 / "trials.jsonl", [row_a, row_b])
     # Duplicate row_b across shards to validate dedupe.
-    (shard2 / "trials.jsonl").write_text(
-        json.dumps(row_b, ensure_ascii=False) + "\n",
-        encoding="utf-8",
-    )
+    write_jsonl(shard2 / "trials.jsonl", [row_b])
 
     out_dir = tmp_path / "merged"
-    result = subprocess.run(
+    result = run_script(
+        "merge_pubchem_trials_shards",
         [
-            sys.executable,
-            "scripts/merge_pubchem_trials_shards.py",
             "--shard-dirs",
             f"{shard1},{shard2}",
             "--out-dir",
             str(out_dir),
         ],
-        capture_output=True,
-        text=True,
     )
     assert result.returncode == 0, result.stderr
 
-    rows = [json.loads(x) for x in (out_dir / "trials.jsonl").read_text(encoding="utf-8").splitlines() if x.strip()]
+    rows = read_jsonl(out_dir / "trials.jsonl")
     assert len(rows) == 2
 
     summary = json.loads((out_dir / "summary.json").read_text(encoding="utf-8"))
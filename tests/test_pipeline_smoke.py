@@ -1,12 +1,14 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2026 Magic AI Research Association
 
+import pytest
+
 from clinical_data_analyzer.ctgov import CTGovClient
 from clinical_data_analyzer.pubchem.client import PubChemClient
 from clinical_data_analyzer.pipeline.build_dataset import DatasetBuildConfig, build_dataset_for_cids
 
 
-def test_pipeline_smoke(tmp_path):
+def _run_pipeline(tmp_path):
     pub = PubChemClient()
     ct = CTGovClient()
     cids = pub.cids_by_name("aspirin")[:1]
@@ -18,3 +20,13 @@ def test_pipeline_smoke(tmp_path):
     assert (tmp_path / "links.jsonl").exists()
     assert (tmp_path / "studies.jsonl").exists()
     assert len(out) == 3
+
+
+def test_pipeline_smoke(tmp_path, mock_pubchem_session, mock_ctgov_session):
+    _run_pipeline(tmp_path)
+    assert "NCT00000001" in (tmp_path / "studies.jsonl").read_text(encoding="utf-8")
+
+
+@pytest.mark.network
+def test_pipeline_smoke_remote(tmp_path, shared_remote_session):
+    _run_pipeline(tmp_path)
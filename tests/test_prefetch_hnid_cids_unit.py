@@ -1,39 +1,32 @@
 from __future__ import annotations
 
-import subprocess
-import sys
 from pathlib import Path
 
+import pytest
 
-def _make_stub_pkg(tmp_path: Path, body: str) -> Path:
-    stub_dir = tmp_path / "stubs"
-    stub_dir.mkdir()
 
-    pkg = stub_dir / "clinical_data_analyzer"
-    pkg.mkdir()
-    (pkg / "__init__.py").write_text("", encoding="utf-8")
+@pytest.fixture
+def prefetch(monkeypatch, run_script, script_module):
+    """Run prefetch_hnid_cids in-process with ``get_cids`` replaced by ``fake_get_cids``."""
+    module = script_module("prefetch_hnid_cids")
 
-    pubchem_pkg = pkg / "pubchem"
-    pubchem_pkg.mkdir()
-    (pubchem_pkg / "__init__.py").write_text(body, encoding="utf-8")
-    return stub_dir
+    def run(args, fake_get_cids):
+        class PubChemClassificationClient:
+            def get_cids(self, hnid, fmt="TXT"):
+                return fake_get_cids(hnid)
 
+        monkeypatch.setattr(module, "PubChemClassificationClient", PubChemClassificationClient)
+        return run_script("prefetch_hnid_cids", args)
+
+    return run
 
-def test_prefetch_hnid_cids_updates_fallback_unit(tmp_path: Path):
-    stub_dir = _make_stub_pkg(
-        tmp_path,
-        "class PubChemClassificationClient:\n"
-        "    def get_cids(self, hnid, fmt='TXT'):\n"
-        "        return [3, 1, 3, 2]\n",
-    )
 
+def test_prefetch_hnid_cids_updates_fallback_unit(tmp_path: Path, prefetch):
     out_file = tmp_path / "out.txt"
     fallback_file = tmp_path / "fallback.txt"
 
-    result = subprocess.run(
+    result = prefetch(
         [
-            sys.executable,
-            "scripts/prefetch_hnid_cids.py",
             "--hnid",
             "1856916",
             "--out-file",
@@ -42,9 +35,7 @@ def test_prefetch_hnid_cids_updates_fallback_unit(tmp_path: Path):
             str(fallback_file),
             "--update-fallback",
         ],
-        capture_output=True,
-        text=True,
-        env={"PYTHONPATH": str(stub_dir)},
+        lambda hnid: [3, 1, 3, 2],
     )
     assert result.returncode == 0, result.stderr
 
@@ -54,22 +45,16 @@ def test_prefetch_hnid_cids_updates_fallback_unit(tmp_path: Path):
     assert fb_lines == ["3", "1", "2"]
 
 
-def test_prefetch_hnid_cids_uses_fallback_on_error_unit(tmp_path: Path):
-    stub_dir = _make_stub_pkg(
-        tmp_path,
-        "class PubChemClassificationClient:\n"
-        "    def get_cids(self, hnid, fmt='TXT'):\n"
-        "        raise RuntimeError('HTTP 503 ServerBusy')\n",
-    )
+def test_prefetch_hnid_cids_uses_fallback_on_error_unit(tmp_path: Path, prefetch):
+    def busy(hnid):
+        raise RuntimeError("HTTP 503 ServerBusy")
 
     out_file = tmp_path / "out.txt"
     fallback_file = tmp_path / "fallback.txt"
     fallback_file.write_text("10\n11\n", encoding="utf-8")
 
-    result = subprocess.run(
+    result = prefetch(
         [
-            sys.executable,
-            "scripts/prefetch_hnid_cids.py",
             "--hnid",
             "1856916",
             "--out-file",
@@ -77,9 +62,7 @@ def test_prefetch_hnid_cids_uses_fallback_on_error_unit(tmp_path: Path):
             "--fallback-file",
             str(fallback_file),
         ],
-        capture_output=True,
-        text=True,
-        env={"PYTHONPATH": str(stub_dir)},
+        busy,
     )
     assert result.returncode == 0, result.stderr
 
@@ -1,10 +1,21 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2026 Magic AI Research Association
 
+import pytest
+
 from clinical_data_analyzer.pubchem.client import PubChemClient
 
 
-def test_pubchem_basic():
+def test_pubchem_basic(mock_pubchem_session):
+    p = PubChemClient()
+    cids = p.cids_by_name("aspirin")
+    assert cids == [2244]
+    props = p.compound_properties(cids[0])
+    assert props["InChIKey"] == "BSYNRYMUTXBXSQ-UHFFFAOYSA-N"
+
+
+@pytest.mark.network
+def test_pubchem_basic_remote(shared_remote_session):
     p = PubChemClient()
     cids = p.cids_by_name("aspirin")
     assert len(cids) > 0
@@ -1,9 +1,31 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2026 Magic AI Research Association
 
+import importlib
+
+import pytest
+
 from clinical_data_analyzer.pubchem import PubChemClassificationClient
 
-def test_hnid_to_cids_smoke():
+# Every import surface of the client; they must all resolve to the same class.
+CLIENT_MODULES = (
+    "clinical_data_analyzer.pubchem",
+    "clinical_data_analyzer.pubchem.classification_nodes",
+    "clinpipe.pubchem",
+)
+
+
+@pytest.mark.parametrize("module", CLIENT_MODULES)
+def test_hnid_to_cids_smoke(module, mock_pubchem_session):
+    client_cls = importlib.import_module(module).PubChemClassificationClient
+    assert client_cls is PubChemClassificationClient
+    cids = client_cls().get_cids(1856916)
+    assert cids == [2244]
+    assert mock_pubchem_session.calls[-1].endswith("/hnid/1856916/cids/TXT")
+
+
+@pytest.mark.network
+def test_hnid_to_cids_smoke_remote(shared_remote_session):
     hnid = 1856916  # Clinical Trials
     c = PubChemClassificationClient()
     cids = c.get_cids(hnid)
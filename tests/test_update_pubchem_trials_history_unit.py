@@ -4,65 +4,58 @@
 from __future__ import annotations
 
 import json
-import subprocess
-import sys
 from pathlib import Path
 
+import pytest
 
-def _run(args: list[str]) -> subprocess.CompletedProcess[str]:
-    return subprocess.run([sys.executable, "scripts/update_pubchem_trials_history.py", *args], capture_output=True, text=True)
-
-
-def test_update_pubchem_trials_history_unit(tmp_path: Path):
-    src = tmp_path / "src"
-    src.mkdir(parents=True, exist_ok=True)
-
-    trials = src / "trials.json"
-    trials.write_text('[{"id":"NCT1"}]\n', encoding="utf-8")
-
-    state = tmp_path / "snapshots" / "collection_state.json"
-    latest = tmp_path / "snapshots" / "latest" / "trials.json"
-    history = tmp_path / "snapshots" / "history"
-    flag = tmp_path / "changed.txt"
-
-    r1 = _run(
-        [
-            "--trials-file",
-            str(trials),
-            "--state-file",
-            str(state),
-            "--latest-file",
-            str(latest),
-            "--history-dir",
-            str(history),
-            "--timestamp",
-            "2026-02-10T00:00:00Z",
-            "--changed-flag-path",
-            str(flag),
-        ]
-    )
+# Layout under tmp_path shared by every test; the script creates the directories.
+STATE = Path("snapshots") / "collection_state.json"
+LATEST = Path("snapshots") / "latest" / "trials.json"
+HISTORY = Path("snapshots") / "history"
+FLAG = Path("changed.txt")
+
+
+@pytest.fixture
+def trials(tmp_path: Path) -> Path:
+    path = tmp_path / "trials.json"
+    path.write_text('[{"id":"NCT1"}]\n', encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def _run(tmp_path: Path, trials: Path, run_script):
+    """Run the script on the shared layout at ``timestamp`` with any extra flags."""
+    base = [
+        "--trials-file",
+        str(trials),
+        "--state-file",
+        str(tmp_path / STATE),
+        "--latest-file",
+        str(tmp_path / LATEST),
+        "--history-dir",
+        str(tmp_path / HISTORY),
+    ]
+
+    def run(timestamp: str, *extra: str):
+        args = [*base, "--timestamp", timestamp, *extra]
+        return run_script("update_pubchem_trials_history", args)
+
+    return run
+
+
+def test_update_pubchem_trials_history_unit(tmp_path: Path, _run):
+    state = tmp_path / STATE
+    history = tmp_path / HISTORY
+    flag = tmp_path / FLAG
+
+    r1 = _run("2026-02-10T00:00:00Z", "--changed-flag-path", str(flag))
     assert r1.returncode == 0, r1.stderr
     assert "changed: true" in r1.stdout
-    assert latest.exists()
+    assert (tmp_path / LATEST).exists()
     assert len(list(history.glob("trials_*.json"))) == 1
     assert flag.read_text(encoding="utf-8").strip() == "true"
 
-    r2 = _run(
-        [
-            "--trials-file",
-            str(trials),
-            "--state-file",
-            str(state),
-            "--latest-file",
-            str(latest),
-            "--history-dir",
-            str(history),
-            "--timestamp",
-            "2026-02-10T01:00:00Z",
-            "--changed-flag-path",
-            str(flag),
-        ]
-    )
+    r2 = _run("2026-02-10T01:00:00Z", "--changed-flag-path", str(flag))
     assert r2.returncode == 0, r2.stderr
     assert "changed: false" in r2.stdout
     assert len(list(history.glob("trials_*.json"))) == 2
@@ -74,160 +67,71 @@ def test_update_pubchem_trials_history_unit(tmp_path: Path):
     assert state_obj["history_count"] == 2
 
 
-def test_update_pubchem_trials_history_snapshot_on_change(tmp_path: Path):
-    src = tmp_path / "src"
-    src.mkdir(parents=True, exist_ok=True)
-
-    trials = src / "trials.json"
-    trials.write_text('[{"id":"NCT1"}]\n', encoding="utf-8")
-
-    state = tmp_path / "snapshots" / "collection_state.json"
-    latest = tmp_path / "snapshots" / "latest" / "trials.json"
-    history = tmp_path / "snapshots" / "history"
-
-    r1 = _run(
-        [
-            "--trials-file",
-            str(trials),
-            "--state-file",
-            str(state),
-            "--latest-file",
-            str(latest),
-            "--history-dir",
-            str(history),
-            "--timestamp",
-            "2026-02-10T00:00:00Z",
-            "--snapshot-on-change",
-        ]
-    )
+def test_update_pubchem_trials_history_snapshot_on_change(tmp_path: Path, trials: Path, _run):
+    history = tmp_path / HISTORY
+
+    r1 = _run("2026-02-10T00:00:00Z", "--snapshot-on-change")
     assert r1.returncode == 0, r1.stderr
     assert len(list(history.glob("trials_*.json"))) == 1
 
-    r2 = _run(
-        [
-            "--trials-file",
-            str(trials),
-            "--state-file",
-            str(state),
-            "--latest-file",
-            str(latest),
-            "--history-dir",
-            str(history),
-            "--timestamp",
-            "2026-02-10T01:00:00Z",
-            "--snapshot-on-change",
-        ]
-    )
+    r2 = _run("2026-02-10T01:00:00Z", "--snapshot-on-change")
     assert r2.returncode == 0, r2.stderr
     assert len(list(history.glob("trials_*.json"))) == 1
 
     trials.write_text('[{"id":"NCT1"},{"id":"NCT2"}]\n', encoding="utf-8")
 
-    r3 = _run(
-        [
-            "--trials-file",
-            str(trials),
-            "--state-file",
-            str(state),
-            "--latest-file",
-            str(latest),
-            "--history-dir",
-            str(history),
-            "--timestamp",
-            "2026-02-10T02:00:00Z",
-            "--snapshot-on-change",
-        ]
-    )
+    r3 = _run("2026-02-10T02:00:00Z", "--snapshot-on-change")
     assert r3.returncode == 0, r3.stderr
     assert len(list(history.glob("trials_*.json"))) == 2
 
 
-def test_update_pubchem_trials_history_retention_prunes_old(tmp_path: Path):
-    src = tmp_path / "src"
-    src.mkdir(parents=True, exist_ok=True)
-    trials = src / "trials.json"
-    trials.write_text('[{"id":"NCT1"}]\n', encoding="utf-8")
-
-    state = tmp_path / "snapshots" / "collection_state.json"
-    latest = tmp_path / "snapshots" / "latest" / "trials.json"
-    history = tmp_path / "snapshots" / "history"
-    history.mkdir(parents=True, exist_ok=True)
+def test_update_pubchem_trials_history_retention_prunes_old(tmp_path: Path, _run):
+    history = tmp_path / HISTORY
+    history.mkdir(parents=True)
 
     old_snapshot = history / "trials_20240101T000000Z.json"
     old_snapshot.write_text("[]\n", encoding="utf-8")
 
-    r = _run(
-        [
-            "--trials-file",
-            str(trials),
-            "--state-file",
-            str(state),
-            "--latest-file",
-            str(latest),
-            "--history-dir",
-            str(history),
-            "--timestamp",
-            "2026-02-23T00:00:00Z",
-            "--retention-days",
-            "365",
-        ]
-    )
+    r = _run("2026-02-23T00:00:00Z", "--retention-days", "365")
     assert r.returncode == 0, r.stderr
     assert not old_snapshot.exists()
     assert "pruned_snapshots: 1" in r.stdout
 
-    state_obj = json.loads(state.read_text(encoding="utf-8"))
+    state_obj = json.loads((tmp_path / STATE).read_text(encoding="utf-8"))
     assert state_obj["last_pruned_count"] == 1
 
 
-def test_update_pubchem_trials_history_with_aux_assets_unit(tmp_path: Path):
-    src = tmp_path / "src"
-    src.mkdir(parents=True, exist_ok=True)
-
-    trials = src / "trials.json"
-    compounds = src / "compounds.json"
-    compact = src / "trials_compact.json"
+def test_update_pubchem_trials_history_with_aux_assets_unit(tmp_path: Path, trials: Path, _run):
+    compounds = tmp_path / "compounds.json"
+    compact = tmp_path / "trials_compact.json"
 
     trials.write_text('[{"cid":1,"id":"NCT1"}]\n', encoding="utf-8")
     compounds.write_text('[{"cid":1,"smiles":"C"}]\n', encoding="utf-8")
     compact.write_text('[{"cid":1,"id":"NCT1"}]\n', encoding="utf-8")
 
-    state = tmp_path / "snapshots" / "collection_state.json"
-    latest_trials = tmp_path / "snapshots" / "latest" / "trials.json"
     latest_compounds = tmp_path / "snapshots" / "latest" / "compounds.json"
     latest_compact = tmp_path / "snapshots" / "latest" / "trials_compact.json"
-    history = tmp_path / "snapshots" / "history"
-    flag = tmp_path / "changed.txt"
-
-    r1 = _run(
-        [
-            "--trials-file",
-            str(trials),
-            "--compounds-file",
-            str(compounds),
-            "--trials-compact-file",
-            str(compact),
-            "--state-file",
-            str(state),
-            "--latest-file",
-            str(latest_trials),
-            "--latest-compounds-file",
-            str(latest_compounds),
-            "--latest-trials-compact-file",
-            str(latest_compact),
-            "--history-dir",
-            str(history),
-            "--timestamp",
-            "2026-02-10T00:00:00Z",
-            "--changed-flag-path",
-            str(flag),
-            "--snapshot-on-change",
-        ]
-    )
+    history = tmp_path / HISTORY
+    flag = tmp_path / FLAG
+    aux = [
+        "--compounds-file",
+        str(compounds),
+        "--trials-compact-file",
+        str(compact),
+        "--latest-compounds-file",
+        str(latest_compounds),
+        "--latest-trials-compact-file",
+        str(latest_compact),
+        "--changed-flag-path",
+        str(flag),
+        "--snapshot-on-change",
+    ]
+
+    r1 = _run("2026-02-10T00:00:00Z", *aux)
     assert r1.returncode == 0, r1.stderr
     assert "changed: true" in r1.stdout
     assert flag.read_text(encoding="utf-8").strip() == "true"
-    assert latest_trials.exists()
+    assert (tmp_path / LATEST).exists()
     assert latest_compounds.exists()
     assert latest_compact.exists()
     assert len(list(history.glob("trials_*.json"))) == 1
@@ -236,31 +140,7 @@ def test_update_pubchem_trials_history_with_aux_assets_unit(tmp_path: Path):
 
     compounds.write_text('[{"cid":1,"smiles":"CC"}]\n', encoding="utf-8")
 
-    r2 = _run(
-        [
-            "--trials-file",
-            str(trials),
-            "--compounds-file",
-            str(compounds),
-            "--trials-compact-file",
-            str(compact),
-            "--state-file",
-            str(state),
-            "--latest-file",
-            str(latest_trials),
-            "--latest-compounds-file",
-            str(latest_compounds),
-            "--latest-trials-compact-file",
-            str(latest_compact),
-            "--history-dir",
-            str(history),
-            "--timestamp",
-            "2026-02-10T01:00:00Z",
-            "--changed-flag-path",
-            str(flag),
-            "--snapshot-on-change",
-        ]
-    )
+    r2 = _run("2026-02-10T01:00:00Z", *aux)
     assert r2.returncode == 0, r2.stderr
     assert "changed: true" in r2.stdout
     assert "changed_assets: compounds" in r2.stdout
@@ -269,7 +149,7 @@ def test_update_pubchem_trials_history_with_aux_assets_unit(tmp_path: Path):
     assert len(list(history.glob("compounds_*.json"))) == 2
     assert len(list(history.glob("trials_compact_*.json"))) == 1
 
-    state_obj = json.loads(state.read_text(encoding="utf-8"))
+    state_obj = json.loads((tmp_path / STATE).read_text(encoding="utf-8"))
     assert state_obj["schema_version"] == 2
     assert state_obj["history_counts"]["compounds"] == 2
     assert state_obj["history_counts"]["trials"] == 1